@@ -11,8 +11,8 @@ def evaluate_model(model_path, num_solves=50, scramble_len=20, max_steps=100):
     act_dim = env.action_space.n
     
     agent = PPOAgent(obs_dim, act_dim)
-    agent.policy.load_state_dict(torch.load(model_path, map_location=torch.device('cpu')))
-    agent.policy.eval()
+    # A state dict, a frozen / int8 build or an .npz from src.agent.export
+    agent.load_inference_model(model_path)
     
     success_count = 0
     total_moves = 0
@@ -39,9 +39,10 @@ def evaluate_model(model_path, num_solves=50, scramble_len=20, max_steps=100):
             moves += 1
             
             # Update stage tracking
-            max_cross = max(max_cross, env.unwrapped.cube.cross_count())
-            max_f2l = max(max_f2l, env.unwrapped.cube.f2l_slots_solved())
-            if env.unwrapped.cube.eo_solved(): has_eo = True
+            progress = env.unwrapped.cube.progress()
+            max_cross = max(max_cross, progress.cross)
+            max_f2l = max(max_f2l, progress.f2l)
+            if progress.eo: has_eo = True
             
             if terminated:
                 solved = True
@@ -1,66 +1,10 @@
 
 import sqlite3
 import numpy as np
-import re
 from src.cube.cube import Cube
 from src.env.cube_env import CubeEnv
 from src.cube.constants import MOVE_NAMES
-
-def parse_moves(move_str):
-    # Remove comments and garbage
-    move_str = re.sub(r"//.*", "", move_str)
-    move_str = re.sub(r"\(.*?\)", "", move_str).replace("|", "").replace("  ", " ")
-    
-    # Split handles spaces and newlines
-    raw_moves = move_str.split()
-    
-    parsed = []
-    for m in raw_moves:
-        if m == "" or m == " " or "//" in m: continue
-        
-        # Handle wide moves (e.g. r -> x L, r' -> x' L')
-        if m.startswith('r'):
-             if "'" in m: parsed.extend(['x', "L'"])
-             elif "2" in m: parsed.extend(['x2', "L2"])
-             else: parsed.extend(['x', "L"])
-        elif m.startswith('l'):
-             if "'" in m: parsed.extend(["x'", "R'"])
-             elif "2" in m: parsed.extend(["x2", "R2"])
-             else: parsed.extend(["x'", "R"])
-        elif m.startswith('u'):
-             if "'" in m: parsed.extend(["y", "D'"])
-             elif "2" in m: parsed.extend(["y2", "D2"])
-             else: parsed.extend(["y", "D"])
-        elif m.startswith('d'):
-             if "'" in m: parsed.extend(["y'", "U'"])
-             elif "2" in m: parsed.extend(["y2", "U2"])
-             else: parsed.extend(["y'", "U"])
-        elif m.startswith('f'):
-             if "'" in m: parsed.extend(["z", "B'"])
-             elif "2" in m: parsed.extend(["z2", "B2"])
-             else: parsed.extend(["z", "B"])
-        elif m.startswith('b'):
-             if "'" in m: parsed.extend(["z'", "F'"])
-             elif "2" in m: parsed.extend(["z2", "F2"])
-             else: parsed.extend(["z'", "F"])
-        elif m in ["M", "M'", "M2"]:
-            # M follows L direction
-            if m == "M": parsed.extend(["x'", "R", "L'"])
-            elif m == "M'": parsed.extend(["x", "R'", "L"])
-            elif m == "M2": parsed.extend(["x2", "R2", "L2"])
-        else:
-            # Handle standard moves, normalize ' to '
-            m = m.replace("’", "'")
-            # If it's a valid move, use it
-            if m in MOVE_NAMES:
-                parsed.append(m)
-            elif m.lower() in [name.lower() for name in MOVE_NAMES]:
-                # find the correct case
-                for name in MOVE_NAMES:
-                    if name.lower() == m.lower():
-                        parsed.append(name)
-                        break
-    return parsed
+from src.cube.moves import parse_moves
 
 def generate_bc_dataset(db_path, limit=1000, stage="full"):
     conn = sqlite3.connect(db_path)
@@ -88,9 +32,7 @@ def generate_bc_dataset(db_path, limit=1000, stage="full"):
             else:
                 # DERIVE CROSS: Apply moves until cross_count == 4
                 temp_cube = Cube()
-                for m in scramble_moves:
-                    try: temp_cube.apply_move(m)
-                    except: continue
+                temp_cube.apply_sequence(scramble_moves)
                 
                 derived = []
                 for m in raw_sol_moves:
@@ -111,9 +53,7 @@ def generate_bc_dataset(db_path, limit=1000, stage="full"):
         if total_steps == 0: continue
 
         cube = Cube()
-        for m in scramble_moves:
-            try: cube.apply_move(m)
-            except: continue
+        cube.apply_sequence(scramble_moves)
             
         view = { 'U':'U', 'D':'D', 'L':'L', 'R':'R', 'F':'F', 'B':'B' }
         
@@ -0,0 +1,130 @@
+import os
+import sys
+import time
+import zipfile
+import numpy as np
+import torch
+import torch.nn as nn
+from src.agent.model import ActorCritic
+from src.agent.numpy_model import NumpyActorCritic
+
+# CPU inference builds of ActorCritic.
+# export() scripts a trained model and freezes it (weights become constants,
+# LayerNorm/ReLU chains are fused where the JIT can), optionally after
+# dynamic int8 quantization of every Linear layer: weights are stored as int8
+# and activations are quantized per batch, which mainly pays off at large
+# batch sizes. export_npz() writes the weights for the torch-free
+# NumpyActorCritic. load_model() opens any of these or a plain state dict,
+# so solvers, PPOAgent and eval.py can take whichever is given.
+
+BENCH_BATCH_SIZES = (1, 64, 1024)
+
+def model_from_state_dict(state):
+    """ActorCritic with input and action sizes taken from the state dict."""
+    model = ActorCritic(state['input_layer.0.weight'].shape[1], state['actor.2.weight'].shape[0])
+    model.load_state_dict(state)
+    return model.eval()
+
+def is_torchscript(path) -> bool:
+    # Scripted archives carry the module's source under <name>/code/
+    if not zipfile.is_zipfile(path):
+        return False
+    with zipfile.ZipFile(path) as archive:
+        return any(name.split('/')[1:2] == ['code'] for name in archive.namelist())
+
+def load_model(path):
+    """Model for inference from path: a frozen TorchScript module written by
+    export(), a NumpyActorCritic for an .npz from export_npz(), or an eager
+    ActorCritic for a state dict. All are called as model(obs) -> (logits, values).
+    """
+    if path.endswith('.npz'):
+        return NumpyActorCritic.from_npz(path)
+    if is_torchscript(path):
+        return torch.jit.load(path, map_location='cpu')
+    return model_from_state_dict(torch.load(path, map_location=torch.device('cpu')))
+
+def quantize(model):
+    """Copy of model with every nn.Linear dynamically quantized to int8."""
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+def export(model, path, quantized=False):
+    """Write model as a frozen TorchScript module (int8 Linear layers with
+    quantized=True) and return the frozen module.
+    """
+    model = model.eval()
+    if quantized:
+        model = quantize(model)
+    frozen = torch.jit.freeze(torch.jit.script(model))
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    torch.jit.save(frozen, path)
+    return frozen
+
+def export_npz(model, path):
+    """Write model's weights as an .npz for NumpyActorCritic.from_npz."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    np.savez(path, **{name: w.detach().cpu().numpy() for name, w in model.state_dict().items()})
+
+def check_accuracy(reference, model, obs) -> dict:
+    """How far model's outputs on obs (N, obs_dim) are from reference's:
+    largest logit and value differences, and the fraction of rows whose
+    top move agrees.
+    """
+    with torch.no_grad():
+        ref_logits, ref_values = reference(obs)
+        if isinstance(model, NumpyActorCritic):
+            logits, values = map(torch.from_numpy, model(obs.numpy()))
+        else:
+            logits, values = model(obs)
+    return {
+        'max_logit_error': float((logits - ref_logits).abs().max()),
+        'max_value_error': float((values - ref_values).abs().max()),
+        'top_move_agreement': float((logits.argmax(-1) == ref_logits.argmax(-1)).float().mean()),
+    }
+
+def benchmark(model, obs_dim, batch_sizes=BENCH_BATCH_SIZES, seconds=1.0) -> dict:
+    """Mean milliseconds per forward call at each batch size."""
+    timings = {}
+    for n in batch_sizes:
+        obs = torch.rand(n, obs_dim)
+        if isinstance(model, NumpyActorCritic):
+            obs = obs.numpy()
+        with torch.no_grad():
+            model(obs)      # warm-up; the first calls of a frozen module run the JIT optimizer
+            model(obs)
+            calls, start = 0, time.perf_counter()
+            while calls < 3 or time.perf_counter() - start < seconds:
+                model(obs)
+                calls += 1
+        timings[n] = (time.perf_counter() - start) / calls * 1000
+    return timings
+
+
+def export_all(state_path, out_dir=None, samples=4096):
+    """Write <name>.ts, <name>_int8.ts and <name>.npz next to a state dict
+    (or into out_dir), check each against the eager model on random
+    observations in [0, 1) and print accuracy and latency for each.
+    Returns the paths.
+    """
+    eager = model_from_state_dict(torch.load(state_path, map_location=torch.device('cpu')))
+    obs_dim = eager.input_layer[0].in_features
+    stem = os.path.splitext(os.path.basename(state_path))[0]
+    out_dir = out_dir or os.path.dirname(state_path)
+    paths = {'fp32': os.path.join(out_dir, f"{stem}.ts"), 'int8': os.path.join(out_dir, f"{stem}_int8.ts"),
+             'numpy': os.path.join(out_dir, f"{stem}.npz")}
+
+    obs = torch.rand(samples, obs_dim)
+    models = {'eager': eager}
+    for kind, path in paths.items():
+        if kind == 'numpy':
+            export_npz(eager, path)
+            models[kind] = NumpyActorCritic.from_npz(path)
+        else:
+            models[kind] = export(eager, path, quantized=kind == 'int8')
+        print(f"{kind}: {path} {check_accuracy(eager, models[kind], obs)}")
+    for kind, model in models.items():
+        timings = benchmark(model, obs_dim)
+        print(f"{kind:6} " + "  ".join(f"batch {n}: {ms:.3f} ms" for n, ms in timings.items()))
+    return paths
+
+if __name__ == "__main__":
+    export_all(sys.argv[1] if len(sys.argv) > 1 else "models/pretrained_policy.pth")
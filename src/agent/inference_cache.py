@@ -0,0 +1,111 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+from src.cube.batch import BatchCube
+from src.agent.numpy_model import run_model
+from src.cube.symmetry import SYM_MOVE, _packed, conjugate_rows
+
+# Symmetries that map every one of the 27 moves to a single move, so policy
+# logits can be carried across them (see symmetry.SYM_MOVE)
+CACHE_SYMS = np.flatnonzero((SYM_MOVE >= 0).all(axis=1))
+
+class InferenceCache:
+    """LRU cache of (logits, value) network outputs keyed by cube state.
+    evaluate(batch) runs the model once on the rows it has not seen and
+    serves the rest from the cache. With symmetry=True states are first
+    mapped to the smallest of their images under CACHE_SYMS, the network
+    runs on that representative and its logits are permuted back with
+    SYM_MOVE, so symmetric states share an entry.
+    The cache clears itself when any model parameter is modified in place
+    (optimizer steps, load_state_dict); call invalidate() after other
+    kinds of weight changes.
+    """
+    def __init__(self, model, obs_fn, capacity=1 << 17, symmetry=False):
+        self.model = model
+        self.obs_fn = obs_fn
+        self.capacity = capacity
+        self.symmetry = symmetry
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = self._weights_version()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __call__(self, obs):
+        # Plain forward for callers that only have observations
+        return self.model(obs)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        return {'size': len(self._entries), 'capacity': self.capacity,
+                'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hit_rate}
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._version = self._weights_version()
+
+    def _weights_version(self):
+        # Every in-place update of a tensor bumps its _version counter;
+        # NumpyActorCritic weights never change
+        parameters = getattr(self.model, 'parameters', None)
+        return tuple(p._version for p in parameters()) if parameters else ()
+
+    def _canonical(self, batch):
+        """(representative BatchCube, index into CACHE_SYMS per row): the
+        image with the smallest state key."""
+        rows = (batch.corners_pos, batch.corners_ori, batch.edges_pos, batch.edges_ori)
+        images = [conjugate_rows(*rows, k) for k in CACHE_SYMS]
+        packed = np.stack([_packed(*image) for image in images])      # (syms, N, 20)
+        n = np.arange(len(batch))
+        best = np.zeros(len(batch), dtype=np.int64)
+        for s in range(1, len(images)):
+            current = packed[best, n]
+            diff = packed[s] != current
+            first = np.argmax(diff, axis=1)
+            best[diff.any(axis=1) & (packed[s, n, first] < current[n, first])] = s
+        buf = np.stack([np.concatenate(image, axis=1) for image in images])[best, n]
+        return BatchCube.from_buf(buf.astype(np.int8)), best
+
+    def evaluate(self, batch):
+        """(logits (N, A), values (N,)) float32 arrays for the rows of a BatchCube."""
+        if self._weights_version() != self._version:
+            self.invalidate()
+        sym = None
+        if self.symmetry:
+            batch, sym = self._canonical(batch)
+        keys = batch.state_keys()
+
+        with self._lock:
+            found = [self._entries.get(key) for key in keys]
+            for key, entry in zip(keys, found):
+                if entry is not None:
+                    self._entries.move_to_end(key)
+            miss = [i for i, entry in enumerate(found) if entry is None]
+            self.hits += len(keys) - len(miss)
+            self.misses += len(miss)
+
+        if miss:
+            # A state repeated within the batch goes through the network once
+            _, first, inverse = np.unique(np.array([keys[i] for i in miss]), return_index=True, return_inverse=True)
+            logits, values = run_model(self.model, self.obs_fn(batch.take(np.asarray(miss)[first])))
+            with self._lock:
+                for i, j in zip(miss, inverse.ravel()):
+                    found[i] = (logits[j], values[j])
+                    self._entries[keys[i]] = found[i]
+                while len(self._entries) > self.capacity:
+                    self._entries.popitem(last=False)
+
+        logits = np.stack([entry[0] for entry in found])
+        values = np.array([entry[1] for entry in found], dtype=np.float32)
+        if sym is not None:
+            # Move m on the original state is SYM_MOVE[k, m] on the representative
+            logits = np.take_along_axis(logits, SYM_MOVE[CACHE_SYMS[sym], :logits.shape[1]], axis=1)
+        return logits, values
@@ -0,0 +1,116 @@
+import numpy as np
+from src.cube.constants import MOVE_NAMES
+from src.cube.moves import NO_MOVE, canonical_mask
+from src.cube.batch import BatchCube
+
+class NodePool:
+    """Search tree stored as preallocated parallel arrays, one row per node:
+    cube state (40 bytes, CompactCube.buf layout), parent row, move from the
+    parent, score and depth, about 51 bytes a node. Children only point at
+    their parent, so paths are rebuilt on demand with path() instead of
+    being copied at every expansion. Arrays double in size when full.
+    """
+    # name -> (row shape, dtype); subclasses extend this for per-node data
+    FIELDS = {
+        'states': ((40,), np.int8),
+        'parent': ((), np.int32),
+        'move': ((), np.int8),
+        'score': ((), np.float32),
+        'depth': ((), np.int16),
+    }
+
+    def __init__(self, capacity: int = 1 << 16):
+        for name, (shape, dtype) in self.FIELDS.items():
+            setattr(self, name, np.empty((capacity,) + shape, dtype=dtype))
+        self.n = 0
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def capacity(self):
+        return len(self.parent)
+
+    def clear(self):
+        self.n = 0
+
+    def _reserve(self, n: int):
+        if n <= self.capacity:
+            return
+        capacity = max(n, 2 * self.capacity)
+        for name in self.FIELDS:
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.n] = old[:self.n]
+            setattr(self, name, new)
+
+    def add_root(self, cube, score: float = 0.0) -> int:
+        return int(self.add(BatchCube.from_cubes([cube]), -1, -1, score)[0])
+
+    def add(self, batch: BatchCube, parent, move, score) -> np.ndarray:
+        """Append the rows of batch as nodes; returns their node indices.
+        parent, move and score are per-row arrays or scalars (parent -1 for roots).
+        """
+        n = len(batch)
+        self._reserve(self.n + n)
+        idx = np.arange(self.n, self.n + n)
+        parent = np.broadcast_to(np.asarray(parent, dtype=np.int64), (n,))
+        self.states[idx] = batch.to_buf()
+        self.parent[idx] = parent
+        self.move[idx] = move
+        self.score[idx] = score
+        self.depth[idx] = np.where(parent >= 0, self.depth[np.maximum(parent, 0)] + 1, 0)
+        self.n += n
+        return idx
+
+    def batch(self, idx) -> BatchCube:
+        """The cube states of nodes idx as a BatchCube."""
+        return BatchCube.from_buf(self.states[idx])
+
+    def allowed_moves(self, idx, rotations=True) -> np.ndarray:
+        """(len(idx), 27) masks of the canonical next moves of nodes idx."""
+        parent = self.parent[idx]
+        second_last = np.where(parent >= 0, self.move[np.maximum(parent, 0)], NO_MOVE)
+        return canonical_mask(self.move[idx], second_last, rotations)
+
+    def path_indices(self, i: int) -> list:
+        """Move indices from the root to node i."""
+        path = []
+        while self.parent[i] >= 0:
+            path.append(int(self.move[i]))
+            i = self.parent[i]
+        return path[::-1]
+
+    def path(self, i: int) -> list:
+        """Move names from the root to node i."""
+        return [MOVE_NAMES[m] for m in self.path_indices(i)]
+
+
+class MCTSTree(NodePool):
+    """NodePool with per-edge statistics for Monte Carlo tree search. For
+    node i and move a: prior[i, a] from the policy, visits[i, a], value_sum[i, a],
+    virtual[i, a] (pending descents, see virtual loss) and child[i, a], the
+    node reached by a or -1 if not created yet. expanded[i] is set once i
+    has been evaluated and its priors filled in.
+    """
+    FIELDS = dict(NodePool.FIELDS, **{
+        'prior': ((27,), np.float32),
+        'visits': ((27,), np.int32),
+        'value_sum': ((27,), np.float32),
+        'virtual': ((27,), np.int16),
+        'child': ((27,), np.int32),
+        'expanded': ((), bool),
+    })
+
+    def add(self, batch: BatchCube, parent, move, score) -> np.ndarray:
+        idx = super().add(batch, parent, move, score)
+        self.prior[idx] = 0.0
+        self.visits[idx] = 0
+        self.value_sum[idx] = 0.0
+        self.virtual[idx] = 0
+        self.child[idx] = -1
+        self.expanded[idx] = False
+        parent = np.broadcast_to(np.asarray(parent), idx.shape)
+        has_parent = parent >= 0
+        self.child[parent[has_parent], np.broadcast_to(np.asarray(move), idx.shape)[has_parent]] = idx[has_parent]
+        return idx
@@ -0,0 +1,78 @@
+import numpy as np
+
+# ActorCritic forward pass in plain NumPy, for processes that only solve
+# cubes and should not pay for importing torch. Weights come from an .npz
+# of the model's state dict (export.export_npz); the layer layout mirrors
+# model.py: input projection, residual blocks, post norm, actor and critic heads.
+
+LAYER_NORM_EPS = 1e-5   # nn.LayerNorm default
+
+def _layer_norm(x, weight, bias):
+    mean = x.mean(axis=-1, keepdims=True)
+    centered = x - mean
+    var = (centered * centered).mean(axis=-1, keepdims=True)
+    return centered / np.sqrt(var + LAYER_NORM_EPS) * weight + bias
+
+def _relu(x):
+    return np.maximum(x, 0, out=x)
+
+
+class NumpyActorCritic:
+    """Callable obs (N, obs_dim) -> (logits (N, A), values (N, 1)) float32
+    arrays, same as ActorCritic on the same weights up to float rounding.
+    """
+    def __init__(self, state):
+        state = {name: np.asarray(w, dtype=np.float32) for name, w in state.items()}
+        # Linear weights are stored transposed so that x @ w needs no copy
+        linear = lambda prefix: (np.ascontiguousarray(state[f"{prefix}.weight"].T), state[f"{prefix}.bias"])
+        norm = lambda prefix: (state[f"{prefix}.weight"], state[f"{prefix}.bias"])
+        self.input = linear('input_layer.0'), norm('input_layer.1')
+        n_blocks = len({name.split('.')[1] for name in state if name.startswith('residual_blocks.')})
+        self.blocks = [
+            (linear(f"residual_blocks.{i}.net.0"), norm(f"residual_blocks.{i}.net.1"),
+             linear(f"residual_blocks.{i}.net.3"), norm(f"residual_blocks.{i}.net.4"))
+            for i in range(n_blocks)
+        ]
+        self.post_norm = norm('post_norm')
+        self.actor = linear('actor.0'), linear('actor.2')
+        self.critic = linear('critic.0'), linear('critic.2')
+        self.obs_dim = self.input[0][0].shape[0]
+        self.action_dim = self.actor[1][0].shape[1]
+
+    @classmethod
+    def from_npz(cls, path):
+        with np.load(path) as data:
+            return cls({name: data[name] for name in data.files})
+
+    def __repr__(self):
+        return f"NumpyActorCritic(obs_dim={self.obs_dim}, action_dim={self.action_dim}, blocks={len(self.blocks)})"
+
+    def __call__(self, obs):
+        x = np.atleast_2d(np.asarray(obs, dtype=np.float32))
+        (w, b), norm = self.input
+        x = _relu(_layer_norm(x @ w + b, *norm))
+        for (w1, b1), norm1, (w2, b2), norm2 in self.blocks:
+            h = _relu(_layer_norm(x @ w1 + b1, *norm1))
+            x = _relu(x + _layer_norm(h @ w2 + b2, *norm2))
+        x = _layer_norm(x, *self.post_norm)
+        return self._head(x, self.actor), self._head(x, self.critic)
+
+    @staticmethod
+    def _head(x, layers):
+        (w1, b1), (w2, b2) = layers
+        return _relu(x @ w1 + b1) @ w2 + b2
+
+
+def run_model(model, obs):
+    """(logits (N, A), values (N,)) float32 arrays from a NumpyActorCritic or
+    a torch model (eager or exported) for (N, obs_dim) observations. torch is
+    only imported for torch models.
+    """
+    if isinstance(model, NumpyActorCritic):
+        logits, values = model(obs)
+    else:
+        import torch
+        with torch.no_grad():
+            logits, values = model(torch.as_tensor(obs))
+        logits, values = logits.numpy(), values.numpy()
+    return logits.astype(np.float32, copy=False), values.reshape(len(values)).astype(np.float32, copy=False)
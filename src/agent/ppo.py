@@ -4,6 +4,8 @@ import torch.optim as optim
 import numpy as np
 import os
 from src.agent.model import ActorCritic
+from src.agent.export import load_model
+from src.agent.numpy_model import run_model
 
 class PPOAgent:
     def __init__(self, obs_dim, act_dim, lr=3e-4, gamma=0.99, eps_clip=0.2, k_epochs=4, hybrid_lambda=1.0):
@@ -23,10 +25,18 @@ class PPOAgent:
             self.policy.load_state_dict(torch.load(path))
             print(f"Loaded pre-trained weights from {path}")
 
+    def load_inference_model(self, path):
+        """Act with a model exported by export.export() or export_npz() (or a
+        state dict) from now on. Exported models are frozen, so this is for
+        evaluation only.
+        """
+        self.policy = load_model(path)
+
     def select_action(self, obs, mask=None):
-        state = torch.FloatTensor(obs).unsqueeze(0)
-        logits, value = self.policy(state)
-        
+        # run_model also takes the NumpyActorCritic of an .npz inference model
+        logits, value = run_model(self.policy, np.asarray(obs, dtype=np.float32)[None])
+        logits = torch.from_numpy(logits)
+
         if mask is not None:
             # Apply mask (mask=False means invalid)
             mask_t = torch.BoolTensor(mask).unsqueeze(0)
@@ -34,7 +44,7 @@ class PPOAgent:
             
         dist = torch.distributions.Categorical(logits=logits)
         action = dist.sample()
-        return action.item(), dist.log_prob(action).item(), value.item()
+        return action.item(), dist.log_prob(action).item(), float(value[0])
 
     def update(self, memory, expert_batch=None):
         # ... logic as before ...
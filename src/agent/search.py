@@ -1,80 +1,610 @@
-
-import torch
-import torch.nn.functional as F
 from src.cube.cube import Cube
+from src.cube.batch import BatchCube
+from src.cube.moves import NO_MOVE, canonical_mask
+from src.agent.nodes import NodePool, MCTSTree
+from src.agent.inference_cache import InferenceCache
+from src.agent.numpy_model import run_model
+from src.cube.goals.manager import GoalManager
 from src.cube.constants import MOVE_NAMES
-import copy
+from src.cube.pdb import DEFAULT_TABLE_DIR, cross_pdb, cross_pair_pdb
+import numpy as np
+import heapq
+import threading
+import time
+from collections import namedtuple
+
+def spatial_obs(batch):
+    """(N, 100) float32 observations with the features of CubeEnv._get_obs and
+    bc_data: [is_edge, id, pos, ori, is_solved] for 8 corner then 12 edge slots.
+    """
+    n = len(batch)
+    parts = []
+    for pos, ori, is_edge in ((batch.corners_pos, batch.corners_ori, 0.0),
+                              (batch.edges_pos, batch.edges_ori, 1.0)):
+        k = pos.shape[1]
+        slot = np.broadcast_to(np.arange(k), pos.shape)
+        ori_scale = 2.0 if k == 8 else 1.0
+        parts.append(np.stack([
+            np.full(pos.shape, is_edge),
+            slot / (k - 1),
+            pos / (k - 1),
+            ori / ori_scale,
+            (pos == slot) & (ori == 0),
+        ], axis=-1))
+    return np.concatenate(parts, axis=1).reshape(n, 100).astype(np.float32)
+
+
+def infer(model, obs_fn, batch):
+    """(logits (N, A), values (N,)) numpy arrays for a BatchCube. model is a
+    torch model, a NumpyActorCritic, or an InferenceCache, which serves
+    states it has seen before (and then uses its own obs_fn).
+    """
+    if isinstance(model, InferenceCache):
+        return model.evaluate(batch)
+    return run_model(model, obs_fn(batch))
+
+def log_softmax(logits):
+    shifted = logits - logits.max(axis=-1, keepdims=True)
+    return shifted - np.log(np.exp(shifted).sum(axis=-1, keepdims=True))
+
+
+def goal_predicate(goal=None, goal_manager=None):
+    """BatchCube -> bool array test for a search goal: None for a solved cube,
+    a GoalManager goal name (e.g. "Yellow Cross", "White F2L Pair 1 (FR)"),
+    or such a predicate already.
+    """
+    if goal is None:
+        return lambda batch: batch.is_solved()
+    if callable(goal):
+        return goal
+    manager = goal_manager or GoalManager()
+    if goal not in manager.goals:
+        raise ValueError(f"Unknown goal: {goal}")
+    return lambda batch: manager.reached(batch, goal)
+
+
+# Result of a deadline-aware search. solution is the full move list or None;
+# best_path leads to the furthest-along state reached (solved, then most F2L
+# pairs, then most cross edges, shorter paths first) and stage is its
+# Progress. nodes counts generated states. Deadlines are checked between
+# depths / iterations / batches, so a search overruns by at most one of those.
+SearchResult = namedtuple('SearchResult', ['solution', 'best_path', 'stage', 'nodes', 'elapsed', 'timed_out'])
+
+class _Anytime:
+    """Deadline and best-partial bookkeeping for a search over a NodePool."""
+    def __init__(self, pool, root, time_budget=None, on_progress=None):
+        self.pool = pool
+        self.start = time.perf_counter()
+        self.deadline = self.start + time_budget if time_budget is not None else np.inf
+        self.on_progress = on_progress
+        self.best, self.best_rank, self.best_stage = root, -1, None
+        self.offer(np.array([root]), pool.batch([root]))
+
+    def expired(self) -> bool:
+        return time.perf_counter() >= self.deadline
+
+    def offer(self, idx, batch):
+        """Consider nodes idx (with cube states batch) for the best partial result."""
+        if len(idx) == 0:
+            return
+        progress = batch.progress()
+        rank = progress.solved * 100 + progress.f2l * 10 + progress.cross
+        # Among equal stages prefer the shortest path
+        k = int(np.lexsort((self.pool.depth[idx], -rank))[0])
+        if rank[k] > self.best_rank:
+            self.best, self.best_rank = int(idx[k]), int(rank[k])
+            self.best_stage = type(progress)(*(bool(x[k]) if x.dtype == bool else int(x[k]) for x in progress))
+
+    def result(self, solution_node=None, timed_out=False) -> SearchResult:
+        if solution_node is not None:
+            self.offer(np.array([solution_node]), self.pool.batch([solution_node]))
+        return SearchResult(
+            self.pool.path(solution_node) if solution_node is not None else None,
+            self.pool.path(self.best), self.best_stage, len(self.pool),
+            time.perf_counter() - self.start, timed_out,
+        )
+
+    def report(self):
+        if self.on_progress is not None:
+            self.on_progress(self.result())
+
+
+StagedResult = namedtuple('StagedResult', ['solution', 'stages'])
+
+def solve_stages(solver, start_cube, goals, keep_previous=True, **search_kwargs) -> StagedResult:
+    """Chain goal-targeted searches, e.g. ["Yellow Cross", "Yellow F2L Pair 1 (FR)"]:
+    each stage searches from the state the previous one ended in, and with
+    keep_previous its goal also requires the earlier stages' goals, so a
+    pair is not inserted by breaking the cross. solution is all stages'
+    moves joined, or None if a stage failed; stages holds every stage's
+    SearchResult up to the first failure. search_kwargs (e.g. time_budget)
+    apply to each stage.
+    """
+    cube = start_cube.copy()
+    moves, stages, done = [], [], []
+    manager = GoalManager()
+    for goal in goals:
+        test = reached = goal_predicate(goal, manager)
+        if keep_previous and done:
+            reached = lambda batch, tests=done + [test]: np.logical_and.reduce([t(batch) for t in tests])
+        done.append(test)
+        result = solver.search(cube, goal=reached, **search_kwargs)
+        stages.append(result)
+        if result.solution is None:
+            return StagedResult(None, stages)
+        cube.apply_sequence(result.solution)
+        moves += result.solution
+    return StagedResult(moves, stages)
+
 
 class BeamSearchSolver:
-    def __init__(self, model, beam_width=5, max_depth=50):
+    def __init__(self, model, beam_width=5, max_depth=50, transpositions=True, rotations=True,
+                 obs_fn=spatial_obs):
+        # Eager ActorCritic, a frozen / int8 build (export.load_model) or a NumpyActorCritic
         self.model = model
         self.beam_width = beam_width
         self.max_depth = max_depth
+        # Encodes a BatchCube for the model: spatial_obs as in CubeEnv and
+        # train_bc.py, or self.get_obs for models trained on 43 features
+        self.obs_fn = obs_fn
+        # Only expand canonical move sequences (moves.CANONICAL_NEXT)
+        self.rotations = rotations
+        # Merge beam entries that reach the same state, keeping the best score
+        self.transpositions = transpositions
         self.move_to_idx = {name: i for i, name in enumerate(MOVE_NAMES)}
 
     def get_obs(self, cube):
-        return torch.FloatTensor(np.concatenate([
-            cube.corners_pos,
-            cube.corners_ori,
-            cube.edges_pos,
-            cube.edges_ori,
-            np.array([
-                cube.cross_count(),
-                cube.f2l_slots_solved(),
-                int(cube.eo_solved())
-            ])
-        ])).unsqueeze(0)
-
-    def solve(self, start_cube):
-        # Beam entry: (score, path, current_cube_state)
-        beam = [(0, [], start_cube.copy())]
-        
+        """(N, 43) float32 observations for a BatchCube, or (1, 43) for one cube."""
+        batch = cube if isinstance(cube, BatchCube) else BatchCube.from_cubes([cube])
+        progress = batch.progress()
+        return np.concatenate([
+            batch.corners_pos,
+            batch.corners_ori,
+            batch.edges_pos,
+            batch.edges_ori,
+            np.stack([progress.cross, progress.f2l, progress.eo], axis=1),
+        ], axis=1).astype(np.float32)
+
+    def solve(self, start_cube, goal=None):
+        return self.search(start_cube, goal=goal).solution
+
+    def search(self, start_cube, time_budget=None, on_progress=None, goal=None) -> SearchResult:
+        """Beam search with an optional wall-clock budget in seconds. When it
+        runs out the result holds the best partial path instead of a solution.
+        on_progress(SearchResult) is called after every depth. goal (see
+        goal_predicate) stops the search at a stage instead of the solved cube.
+        """
+        reached = goal_predicate(goal)
+        # Beam entries are rows of a NodePool; each depth scores the whole
+        # beam in one forward pass and keeps the best beam_width of its
+        # (beam x moves) children by cumulative log-probability.
+        pool = NodePool()
+        beam_idx = np.array([pool.add_root(start_cube)])
+        beam = pool.batch(beam_idx)
+        anytime = _Anytime(pool, beam_idx[0], time_budget, on_progress)
+        # Transposition table: state key -> best cumulative score reached so far
+        seen = {beam.state_keys()[0]: 0.0}
+
         for depth in range(self.max_depth):
-            new_beam = []
-            
-            for score, path, cube in beam:
-                if cube.is_solved():
-                    return path
-                
-                # Get probabilities from model
-                obs = self.get_obs(cube)
-                with torch.no_grad():
-                    logits, _ = self.model(obs)
-                    probs = F.softmax(logits, dim=-1).squeeze(0)
-                
-                # Get top K moves
-                top_probs, top_indices = torch.topk(probs, self.beam_width)
-                
-                for p, idx in zip(top_probs, top_indices):
-                    move_name = MOVE_NAMES[idx.item()]
-                    
-                    # Prevent redundant moves (U U')
-                    if path and path[-1].startswith(move_name[0]) and ("'" in move_name or "'" in path[-1]):
-                         # Basic check, can be more robust
-                         pass
-
-                    new_cube = cube.copy()
-                    new_cube.apply_move(move_name)
-                    
-                    new_score = score + torch.log(p).item()
-                    new_beam.append((new_score, path + [move_name], new_cube))
-            
-            # Keep top K in beam
-            new_beam.sort(key=lambda x: x[0], reverse=True)
-            beam = new_beam[:self.beam_width]
-            
-            # Check if any in beam is solved
-            for score, path, cube in beam:
-                if cube.is_solved():
-                    return path
-        
-        return None # Failed
+            solved = reached(beam)
+            if solved.any():
+                return anytime.result(beam_idx[np.argmax(solved)])
+            if anytime.expired():
+                return anytime.result(timed_out=True)
+
+            logits, _ = infer(self.model, self.obs_fn, beam)
+            log_probs = log_softmax(logits)
+            log_probs[~pool.allowed_moves(beam_idx, self.rotations)] = -np.inf
+
+            # Top K over all children
+            total = (pool.score[beam_idx, None] + log_probs).ravel()
+            if self.transpositions:
+                top, beam = self._select_distinct(beam, total, log_probs.shape[1], seen)
+            else:
+                top, beam = self._select_top(beam, total, log_probs.shape[1])
+            if len(top) == 0:
+                return anytime.result()
+            parent, move = np.divmod(top, log_probs.shape[1])
+            beam_idx = pool.add(beam, beam_idx[parent], move, total[top])
+            anytime.offer(beam_idx, beam)
+            anytime.report()
+
+        solved = reached(beam)
+        if solved.any():
+            return anytime.result(beam_idx[np.argmax(solved)])
+        return anytime.result() # Failed
+
+    def _select_top(self, beam, total, n_moves):
+        """Best beam_width children by score: (flat child indices, their cubes)."""
+        k = min(self.beam_width, total.size)
+        top = np.argpartition(-total, k - 1)[:k]
+        top = top[np.argsort(-total[top], kind='stable')]
+        top = top[np.isfinite(total[top])]
+        parent, move = np.divmod(top, n_moves)
+        children = beam.take(parent)
+        children.apply_moves(move)
+        return top, children
+
+    def _select_distinct(self, beam, total, n_moves, seen):
+        """Best beam_width children by score with one entry per distinct state,
+        skipping states already reached with an equal or better score.
+        Returns (flat child indices, their cubes); seen is updated in place.
+        """
+        order = np.argsort(-total, kind='stable')
+        children = beam.expand(np.arange(n_moves)).take(order)
+        packed = np.ascontiguousarray(children.packed_states())
+        # First occurrence in score order is the best copy of each state
+        _, first = np.unique(packed.view(np.dtype((np.void, packed.shape[1]))).ravel(), return_index=True)
+        first.sort()
+        keep = []
+        for i in first:
+            key, score = packed[i].tobytes(), total[order[i]]
+            if seen.get(key, -np.inf) >= score:
+                continue
+            seen[key] = score
+            keep.append(i)
+            if len(keep) == self.beam_width:
+                break
+        keep = np.array(keep, dtype=np.int64)
+        return order[keep], children.take(keep)
+
+
+class WeightedAStarSolver:
+    """Batched weighted A* in the spirit of DeepCubeA, with the critic's
+    predicted remaining move count as the heuristic. Each iteration pops the
+    batch_size open nodes with the lowest f = g_weight * g + h, generates
+    their canonical children, drops states already reached in as few moves,
+    and scores all new children in one forward pass. Stops at the first
+    solved child or when max_nodes states have been generated.
+    obs_fn encodes a BatchCube for the model; the default matches the
+    observations train_bc.py trains the critic on.
+    """
+    def __init__(self, model, batch_size=200, g_weight=0.6, max_nodes=1_000_000, rotations=False,
+                 obs_fn=spatial_obs):
+        self.model = model
+        self.batch_size = batch_size
+        self.g_weight = g_weight
+        self.max_nodes = max_nodes
+        self.rotations = rotations
+        self.obs_fn = obs_fn
+
+    def heuristic(self, batch) -> np.ndarray:
+        _, values = infer(self.model, self.obs_fn, batch)
+        return np.maximum(values, 0.0)
+
+    def solve(self, start_cube, goal=None):
+        return self.search(start_cube, goal=goal).solution
+
+    def search(self, start_cube, time_budget=None, on_progress=None, goal=None) -> SearchResult:
+        """Weighted A* with an optional wall-clock budget in seconds and goal;
+        see BeamSearchSolver.search. on_progress is called after every iteration.
+        """
+        reached = goal_predicate(goal)
+        pool = NodePool()
+        root = pool.add_root(start_cube)
+        anytime = _Anytime(pool, root, time_budget, on_progress)
+        if reached(pool.batch([root]))[0]:
+            return anytime.result(root)
+        # state bytes -> fewest moves it has been reached in
+        best_g = {pool.states[root].tobytes(): 0}
+        open_list = [(float(self.heuristic(pool.batch([root]))[0]), root)]
+
+        while open_list and len(pool) < self.max_nodes:
+            if anytime.expired():
+                return anytime.result(timed_out=True)
+            parents = []
+            while open_list and len(parents) < self.batch_size:
+                _, i = heapq.heappop(open_list)
+                # Skip entries superseded by a shorter path to the same state
+                if best_g[pool.states[i].tobytes()] == pool.depth[i]:
+                    parents.append(i)
+            if not parents:
+                break
+            parents = np.array(parents)
+
+            rows, moves = np.nonzero(pool.allowed_moves(parents, self.rotations))
+            children = pool.batch(parents[rows])
+            children.apply_moves(moves)
+            g = pool.depth[parents[rows]].astype(np.int64) + 1
+            keep = []
+            for j, key in enumerate(row.tobytes() for row in children.to_buf()):
+                if best_g.get(key, np.inf) > g[j]:
+                    best_g[key] = g[j]
+                    keep.append(j)
+            if not keep:
+                continue
+            keep = np.array(keep)
+            children = children.take(keep)
+
+            solved = reached(children)
+            if solved.any():
+                j = int(np.argmax(solved))
+                node = pool.add(children.take([j]), parents[rows[keep[j]]], moves[keep[j]], 0.0)[0]
+                return anytime.result(node)
+
+            h = self.heuristic(children)
+            nodes = pool.add(children, parents[rows[keep]], moves[keep], h)
+            anytime.offer(nodes, children)
+            anytime.report()
+            f = self.g_weight * g[keep] + h
+            for fi, node in zip(f.tolist(), nodes.tolist()):
+                heapq.heappush(open_list, (fi, node))
+
+        return anytime.result() # Failed
+
+
+class MCTSSolver:
+    """AlphaZero-style Monte Carlo tree search. Policy logits are the priors
+    and the critic's predicted remaining move count h values a leaf, so the
+    edges above it are backed up with -(moves to the leaf + h). Q values are
+    min-max normalised among the siblings before the PUCT rule, with
+    unvisited moves counted as the best.
+    Leaves are collected batch_size at a time and evaluated in one forward
+    pass; virtual loss steers the descents of one batch (and of concurrent
+    workers) apart. With workers > 1, threads select and back up under one
+    lock while their forward passes run in parallel. Stops at the first
+    solved state, after simulations leaf evaluations or at the deadline.
+    """
+    def __init__(self, model, simulations=2000, batch_size=32, workers=1, c_puct=1.5,
+                 virtual_loss=3.0, rotations=False, obs_fn=spatial_obs):
+        self.model = model
+        self.simulations = simulations
+        self.batch_size = batch_size
+        self.workers = workers
+        self.c_puct = c_puct
+        self.virtual_loss = virtual_loss
+        self.rotations = rotations
+        self.obs_fn = obs_fn
+
+    def solve(self, start_cube, goal=None):
+        return self.search(start_cube, goal=goal).solution
+
+    def search(self, start_cube, time_budget=None, on_progress=None, goal=None) -> SearchResult:
+        """MCTS with an optional wall-clock budget in seconds and goal; see
+        BeamSearchSolver.search. on_progress is called after every batch.
+        """
+        self._reached = goal_predicate(goal)
+        self._tree = MCTSTree()
+        self._root = self._tree.add_root(start_cube)
+        self._anytime = _Anytime(self._tree, self._root, time_budget, on_progress)
+        if self._reached(self._tree.batch([self._root]))[0]:
+            return self._anytime.result(self._root)
+        self._lock = threading.Lock()
+        # Notified after every backup, for workers whose descents all ended at
+        # leaves that other workers are still evaluating
+        self._backed_up = threading.Condition(self._lock)
+        self._in_flight = 1     # the root's evaluation below
+        self._done = 0
+        self._solution = None
+        self._evaluate(*self._prepare([self._root]), [self._root], [[]])
+
+        if self.workers > 1:
+            threads = [threading.Thread(target=self._work) for _ in range(self.workers)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        else:
+            self._work()
+        if self._solution is not None:
+            return self._anytime.result(self._solution)
+        return self._anytime.result(timed_out=self._anytime.expired())
+
+    def _work(self):
+        while True:
+            with self._lock:
+                if (self._solution is not None or self._done >= self.simulations
+                        or self._anytime.expired()):
+                    return
+                leaves, paths = self._select_batch()
+                if not leaves:
+                    if self._solution is None:
+                        if not self._in_flight:
+                            return
+                        self._backed_up.wait()
+                    continue
+                inputs = self._prepare(leaves)
+                self._done += len(leaves)
+                self._in_flight += 1
+            self._evaluate(*inputs, leaves, paths)
+
+    # --------------------------------------------------------
+    # Selection (caller holds the lock)
+    # --------------------------------------------------------
+    def _select_action(self, i):
+        tree = self._tree
+        n = tree.visits[i] + tree.virtual[i]
+        w = tree.value_sum[i] - tree.virtual[i] * self.virtual_loss
+        visited = n > 0
+        # Unvisited moves count as good as the best sibling, so every move
+        # of a node is tried once before its subtrees are compared.
+        q = np.ones(len(n))
+        if visited.any():
+            q[visited] = w[visited] / n[visited]
+            lo, hi = q[visited].min(), q[visited].max()
+            q[visited] = (q[visited] - lo) / (hi - lo) if hi > lo else 0.5
+        prior = tree.prior[i]
+        u = self.c_puct * prior * np.sqrt(n.sum() + 1) / (1 + n)
+        score = np.where(prior > 0, q + u, -np.inf)
+        return int(np.argmax(score))
+
+    def _select_batch(self):
+        tree = self._tree
+        leaves, paths = [], []
+        for _ in range(self.batch_size):
+            i, path = self._root, []
+            while tree.expanded[i]:
+                a = self._select_action(i)
+                path.append((i, a))
+                tree.virtual[i, a] += 1
+                child = tree.child[i, a]
+                if child < 0:
+                    batch = tree.batch([i])
+                    batch.apply_moves(a)
+                    child = tree.add(batch, i, a, 0.0)[0]
+                    if self._reached(batch)[0]:
+                        self._solution = child
+                        return [], []
+                    leaves.append(child)
+                    paths.append(path)
+                    path = None
+                    break
+                i = child
+            if path is not None:
+                # Reached a leaf already waiting for evaluation: undo and
+                # evaluate what has been collected so far.
+                for i, a in path:
+                    tree.virtual[i, a] -= 1
+                break
+        return leaves, paths
+
+    def _prepare(self, leaves):
+        """Cube states and legal-move masks of the leaves (needs the lock)."""
+        return self._tree.batch(leaves), self._tree.allowed_moves(leaves, self.rotations)
+
+    # --------------------------------------------------------
+    # Evaluation and backup
+    # --------------------------------------------------------
+    def _evaluate(self, batch, allowed, leaves, paths):
+        logits, values = infer(self.model, self.obs_fn, batch)
+        logits = logits.astype(np.float64)
+        logits[~allowed] = -np.inf
+        priors = np.exp(logits - logits.max(axis=1, keepdims=True))
+        priors /= priors.sum(axis=1, keepdims=True)
+        h = np.maximum(values, 0.0)
+
+        with self._lock:
+            tree = self._tree
+            tree.prior[leaves] = priors
+            tree.score[leaves] = h
+            tree.expanded[leaves] = True
+            self._anytime.offer(np.asarray(leaves), tree.batch(leaves))
+            for path, leaf_h in zip(paths, h):
+                for k, (i, a) in enumerate(reversed(path)):
+                    tree.visits[i, a] += 1
+                    tree.value_sum[i, a] -= k + 1 + leaf_h
+                    tree.virtual[i, a] -= 1
+            self._in_flight -= 1
+            self._backed_up.notify_all()
+            self._anytime.report()
+
+
+class CoordIDAStar:
+    """IDA* over a tuple of coordinates, with the max of several pattern
+    databases as the heuristic. A state is solved when every database reads 0.
+    Only canonical move sequences are searched (moves.CANONICAL_NEXT).
+    """
+    def __init__(self, move_tables, heuristics, moves):
+        # heuristics: list of (pdb table, coordinate positions it indexes, their sizes)
+        self.move_tables = move_tables
+        self.heuristics = heuristics
+        self.moves = np.asarray(moves)
+
+    def _h(self, coords):
+        h = 0
+        for table, positions, sizes in self.heuristics:
+            idx = 0
+            for p, size in zip(positions, sizes):
+                idx = idx * size + coords[p]
+            h = np.maximum(h, table[idx])
+        return h
+
+    def search(self, coords, max_solutions=1, max_depth=20):
+        """All (or the first max_solutions) shortest canonical move-index
+        sequences from coords. Sequences that only differ by the order of
+        commuting moves (U D vs D U) are returned once.
+        """
+        coords = [np.int64(c) for c in coords]
+        bound = int(self._h(coords))
+        solutions = []
+        while bound <= max_depth:
+            self._dfs(coords, bound, [], solutions, max_solutions)
+            if solutions:
+                return solutions
+            bound += 1
+        return solutions
+
+    def _dfs(self, coords, remaining, path, solutions, limit):
+        if remaining == 0:
+            if self._h(coords) == 0:
+                solutions.append(list(path))
+            return limit is not None and len(solutions) >= limit
+        children = [table[c, self.moves] for table, c in zip(self.move_tables, coords)]
+        h = self._h(children)
+        allowed = canonical_mask(path[-1] if path else NO_MOVE, path[-2] if len(path) > 1 else NO_MOVE,
+                                 rotations=False)[self.moves]
+        for i in np.flatnonzero((h < remaining) & allowed):
+            path.append(int(self.moves[i]))
+            if self._dfs([c[i] for c in children], remaining - 1, path, solutions, limit):
+                return True
+            path.pop()
+        return False
+
+
+class CrossSolver:
+    """Optimal cross solver. IDA* over the cross-edge coordinate driven by the
+    exact cross distance table (all 190,080 states), so the search only walks
+    along optimal paths. restrict limits the faces used, e.g. "UDLRF".
+    """
+    def __init__(self, face='D', restrict="UDLRFB", table_dir=DEFAULT_TABLE_DIR):
+        self.pdb = cross_pdb(face, restrict, table_dir=table_dir).load()
+        size = self.pdb.size
+        self.search = CoordIDAStar(self.pdb.move_tables, [(self.pdb.table, [0], [size])], self.pdb.moves)
+
+    def solve(self, cube, max_solutions=None):
+        """Every canonical optimal cross solution (or the first max_solutions)
+        as move lists; of solutions that only reorder commuting moves, one is kept.
+        """
+        solutions = self.search.search([self.pdb.index(cube)], max_solutions)
+        return [[MOVE_NAMES[m] for m in sol] for sol in solutions]
+
+class F2LSolver:
+    """Optimal "cross + any set of F2L pairs" solver (xcross, xxcross, pair
+    insertion with the cross already solved). IDA* over the cross coordinate
+    plus one edge and one corner coordinate per requested slot, with the max of
+    the cross-plus-pair pattern databases of those slots as the heuristic.
+    Tables are built once per slot (about a minute on one core) and
+    memory-mapped afterwards.
+    """
+    SLOTS = ("BL", "BR", "FR", "FL")
+
+    def __init__(self, face='D', restrict="UDLRFB", table_dir=DEFAULT_TABLE_DIR):
+        self.face = face
+        self.restrict = restrict
+        self.table_dir = table_dir
+        self._pdbs = {}
+        self.cross = CrossSolver(face, restrict, table_dir)
+
+    def pdb(self, slot):
+        if slot not in self._pdbs:
+            self._pdbs[slot] = cross_pair_pdb(slot, self.face, self.restrict, table_dir=self.table_dir).load()
+        return self._pdbs[slot]
+
+    def solve(self, cube, bl=False, br=False, fr=False, fl=False, max_solutions=1, max_depth=20):
+        """Shortest move lists solving the cross and the flagged slots."""
+        slots = [slot for slot, flag in zip(self.SLOTS, (bl, br, fr, fl)) if flag]
+        if not slots:
+            return self.cross.solve(cube, max_solutions)
+
+        pdbs = [self.pdb(slot) for slot in slots]
+        cross_table = pdbs[0].move_tables[0]
+        cross_size = pdbs[0].sizes[0]
+        move_tables, coords, heuristics = [cross_table], [pdbs[0].coords[0].encode(cube)], []
+        for p in pdbs:
+            base = len(move_tables)
+            move_tables += p.move_tables[1:]
+            coords += [c.encode(cube) for c in p.coords[1:]]
+            heuristics.append((p.table, [0, base, base + 1], [cross_size] + p.sizes[1:]))
+
+        search = CoordIDAStar(move_tables, heuristics, pdbs[0].moves)
+        solutions = search.search(coords, max_solutions, max_depth)
+        return [[MOVE_NAMES[m] for m in sol] for sol in solutions]
 
 if __name__ == "__main__":
     import numpy as np
     from src.agent.model import ActorCritic
     # Simple test
-    model = ActorCritic(43, 27)
+    model = ActorCritic(100, 27)
     solver = BeamSearchSolver(model, beam_width=3, max_depth=10)
     test_cube = Cube()
     test_cube.apply_move("R")
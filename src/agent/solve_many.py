@@ -0,0 +1,104 @@
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from src.cube.cube import Cube
+
+# Bulk solving over a process pool. Each worker builds its solver once (model
+# weights and tables are loaded in the pool initializer) and then solves
+# scrambles sent to it in chunks. Missing tables are built in the parent
+# first, so the workers only memory-map them.
+
+SolveResult = namedtuple('SolveResult', ['index', 'scramble', 'solution', 'seconds', 'error'])
+
+def make_solver(solver='two_phase', model_path=None, **kwargs):
+    """Callable cube -> move list (or None) for a solver name:
+    'two_phase', 'cross', 'beam', 'astar' or 'mcts'. The last three need the
+    path of an ActorCritic state dict or of a model written by
+    export.export(); an .npz from export.export_npz runs the network in NumPy
+    without importing torch. kwargs go to the solver constructor.
+    """
+    if solver == 'two_phase':
+        from src.agent.two_phase import TwoPhaseSolver
+        return TwoPhaseSolver(**kwargs).solve
+    if solver == 'cross':
+        from src.agent.search import CrossSolver
+        cross = CrossSolver(**kwargs)
+        return lambda cube: next(iter(cross.solve(cube, max_solutions=1)), None)
+
+    from src.agent import search
+    from src.agent.numpy_model import NumpyActorCritic
+    classes = {'beam': search.BeamSearchSolver, 'astar': search.WeightedAStarSolver, 'mcts': search.MCTSSolver}
+    if solver not in classes:
+        raise ValueError(f"Unknown solver: {solver}")
+    if model_path is None:
+        raise ValueError(f"Solver {solver!r} needs model_path")
+    if model_path.endswith('.npz'):
+        model = NumpyActorCritic.from_npz(model_path)
+    else:
+        from src.agent.export import load_model
+        model = load_model(model_path)
+    return classes[solver](model, **kwargs).solve
+
+def _as_cube(scramble):
+    if isinstance(scramble, str):
+        cube = Cube()
+        cube.apply_sequence(scramble)
+        return cube
+    return scramble
+
+def _solve_one(solve, index, scramble):
+    start = time.perf_counter()
+    try:
+        solution, error = solve(_as_cube(scramble)), None
+    except Exception as e:
+        solution, error = None, f"{type(e).__name__}: {e}"
+    return SolveResult(index, scramble, solution, time.perf_counter() - start, error)
+
+
+# Worker state, set once per process by _init_worker
+_WORKER = {}
+
+def _init_worker(solver, model_path, kwargs):
+    _WORKER['solve'] = make_solver(solver, model_path, **kwargs)
+    # torch is only there if the solver loaded a torch model (or the parent
+    # had it imported): one intra-op thread per process, the pool provides
+    # the parallelism
+    torch = sys.modules.get('torch')
+    if torch is not None:
+        torch.set_num_threads(1)
+
+def _solve_chunk(chunk):
+    return [_solve_one(_WORKER['solve'], index, scramble) for index, scramble in chunk]
+
+
+def solve_many(scrambles, solver='two_phase', workers=None, model_path=None, ordered=True,
+               chunksize=8, **solver_kwargs):
+    """Solve many scrambles (move strings or cubes) and yield a SolveResult
+    per item: its index, the scramble, the move list (None if unsolved),
+    seconds spent and the error text if the solver raised.
+    Results stream in input order, or as they complete with ordered=False.
+    workers defaults to the number of CPUs; workers=1 solves in-process.
+    """
+    workers = workers or os.cpu_count() or 1
+    items = list(enumerate(scrambles))
+    if workers == 1:
+        solve = make_solver(solver, model_path, **solver_kwargs)
+        for index, scramble in items:
+            yield _solve_one(solve, index, scramble)
+        return
+
+    if solver in ('two_phase', 'cross'):
+        # Build missing tables once here; workers that each found them
+        # missing would all run the same BFS at the same time
+        make_solver(solver, **solver_kwargs)
+    chunks = [items[i:i + chunksize] for i in range(0, len(items), chunksize)]
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=(solver, model_path, solver_kwargs)) as pool:
+        if ordered:
+            for results in pool.map(_solve_chunk, chunks):
+                yield from results
+        else:
+            for future in as_completed([pool.submit(_solve_chunk, chunk) for chunk in chunks]):
+                yield from future.result()
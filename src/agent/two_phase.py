@@ -0,0 +1,157 @@
+import time
+import numpy as np
+from src.cube.constants import *
+from src.cube.cube import CompactCube
+from src.cube.moves import NO_MOVE, canonical_mask
+from src.cube.coords import CO, EO, CP, PieceCoord
+from src.cube.pdb import DEFAULT_TABLE_DIR, FACE_MOVES, PatternDatabase
+
+# Two-phase (Kociemba) solver.
+# Phase 1 brings the cube into the subgroup <U, D, L2, R2, F2, B2>: all corner
+# twists and edge flips zero and the four E-slice edges back in the E slice.
+# Phase 2 solves the cube inside that subgroup using only its moves.
+# Each phase is an IDA* over small coordinates with pattern databases as the
+# heuristic; the search keeps trying longer phase-1 solutions while that can
+# still shorten the total, until the target length or the time limit is hit.
+
+SLICE_EDGES = (FR, FL, BL, BR)
+SLICE = PieceCoord('edge', SLICE_EDGES, orient=False, ordered=False)           # 495
+UD_EDGES = PieceCoord('edge', range(8), orient=False, slots=range(8))          # 40320
+SLICE_PERM = PieceCoord('edge', SLICE_EDGES, orient=False, slots=SLICE_EDGES)  # 24
+PHASE2_MOVES = (U, U_PRIME, U2, D, D_PRIME, D2, L2, R2, F2, B2)
+N_SLICE, N_SLICE_PERM = SLICE.size, SLICE_PERM.size
+# Deep phase-2 searches are slow; another phase-1 solution is usually cheaper
+PHASE2_MAX_DEPTH = 12
+
+def _parity(perm):
+    """0 for an even permutation, 1 for an odd one."""
+    seen, cycles = set(), 0
+    for i in range(len(perm)):
+        if i not in seen:
+            cycles += 1
+            while i not in seen:
+                seen.add(i)
+                i = int(perm[i])
+    return (len(perm) - cycles) % 2
+
+def _allowed_after(moves):
+    """For each last move (and NO_MOVE at the start) the moves of moves that
+    may follow it in a canonical sequence.
+    """
+    return {last: [m for m in moves if canonical_mask(last, rotations=False)[m]]
+            for last in list(FACE_MOVES) + [NO_MOVE]}
+
+
+class TwoPhaseSolver:
+    """Full-cube solver for arbitrary states, typically 20-22 face moves in
+    well under a second (plus a leading y for states that need a rotation).
+    The four pruning tables (about 1 MB each) are built on first use, a few
+    seconds in total, and memory-mapped afterwards.
+    """
+    def __init__(self, table_dir=DEFAULT_TABLE_DIR):
+        self.table_dir = table_dir
+        twist_slice = PatternDatabase([CO, SLICE], table_dir=table_dir).load()
+        flip_slice = PatternDatabase([EO, SLICE], table_dir=table_dir).load()
+        corner_slice = PatternDatabase([CP, SLICE_PERM], moves=PHASE2_MOVES, table_dir=table_dir).load()
+        edge_slice = PatternDatabase([UD_EDGES, SLICE_PERM], moves=PHASE2_MOVES, table_dir=table_dir).load()
+        self.pdbs = (twist_slice, flip_slice, corner_slice, edge_slice)
+
+        # The searches index single entries millions of times; plain lists
+        # and bytes are much faster than numpy scalars for that.
+        self._twist_move = twist_slice.move_tables[0][:, :18].tolist()
+        self._flip_move = flip_slice.move_tables[0][:, :18].tolist()
+        self._slice_move = twist_slice.move_tables[1][:, :18].tolist()
+        self._cp_move = corner_slice.move_tables[0].tolist()
+        self._ud_move = edge_slice.move_tables[0].tolist()
+        self._sp_move = corner_slice.move_tables[1].tolist()
+        self._twist_slice = bytes(twist_slice.table)
+        self._flip_slice = bytes(flip_slice.table)
+        self._corner_slice = bytes(corner_slice.table)
+        self._edge_slice = bytes(edge_slice.table)
+        self._phase1_after = _allowed_after(FACE_MOVES)
+        self._phase2_after = _allowed_after(PHASE2_MOVES)
+
+    def solve(self, cube, target_length=21, timeout=0.5, max_length=30):
+        """Move names solving cube, or None if nothing of at most max_length
+        moves was found in time. Returns as soon as a solution of at most
+        target_length moves is found, otherwise the shortest one after timeout
+        seconds (the search still runs until it has one).
+        """
+        # Whole-cube rotations move the centres, which the cubie model does not
+        # track: after an odd number of quarter rotations the edge permutation
+        # parity no longer matches the corners and no face-move sequence alone
+        # solves the cube, so such states get a leading y.
+        if int(np.sum(cube.corners_ori)) % 3 or int(np.sum(cube.edges_ori)) % 2:
+            raise ValueError("Unsolvable cube state: bad corner twist or edge flip sum")
+        prefix = []
+        if _parity(cube.corners_pos) != _parity(cube.edges_pos):
+            prefix = ["y"]
+            cube = CompactCube.from_cube(cube)
+            cube.apply_move_idx(Y)
+
+        self._start = CompactCube.from_cube(cube)
+        self._deadline = time.perf_counter() + timeout
+        self._target = target_length
+        self._best = None
+        self._max_length = max_length
+        twist, flip, slc = CO.encode(cube), EO.encode(cube), SLICE.encode(cube)
+
+        depth = self._h1(twist, flip, slc)
+        self._done = False
+        while depth <= self._max_length and not self._done:
+            self._phase1(twist, flip, slc, depth, NO_MOVE, [])
+            depth += 1
+        return None if self._best is None else prefix + [MOVE_NAMES[m] for m in self._best]
+
+    def _h1(self, twist, flip, slc):
+        return max(self._twist_slice[twist * N_SLICE + slc], self._flip_slice[flip * N_SLICE + slc])
+
+    def _h2(self, cp, ud, sp):
+        return max(self._corner_slice[cp * N_SLICE_PERM + sp], self._edge_slice[ud * N_SLICE_PERM + sp])
+
+    def _phase1(self, twist, flip, slc, remaining, last, path):
+        if remaining == 0:
+            # A phase-1 solution ending in a phase-2 move is a shorter phase-1
+            # solution plus a phase-2 move, which phase 2 would find anyway.
+            if not path or path[-1] not in PHASE2_MOVES:
+                self._start_phase2(path)
+            return
+        for m in self._phase1_after[last]:
+            t, f, s = self._twist_move[twist][m], self._flip_move[flip][m], self._slice_move[slc][m]
+            h = max(self._twist_slice[t * N_SLICE + s], self._flip_slice[f * N_SLICE + s])
+            if h < remaining and (h > 0 or remaining == 1):
+                path.append(m)
+                self._phase1(t, f, s, remaining - 1, m, path)
+                path.pop()
+                if self._done:
+                    return
+
+    def _start_phase2(self, phase1):
+        cube = self._start.copy()
+        for m in phase1:
+            cube.apply_move_idx(m)
+        cp, ud, sp = CP.encode(cube), UD_EDGES.encode(cube), SLICE_PERM.encode(cube)
+        limit = (self._max_length if self._best is None else len(self._best) - 1) - len(phase1)
+        limit = min(limit, PHASE2_MAX_DEPTH)
+        last = phase1[-1] if phase1 else NO_MOVE
+        depth = self._h2(cp, ud, sp)
+        path = []
+        while depth <= limit:
+            if self._phase2(cp, ud, sp, depth, last, path):
+                self._best = phase1 + path
+                break
+            depth += 1
+        if self._best is not None and (len(self._best) <= self._target or time.perf_counter() > self._deadline):
+            self._done = True
+
+    def _phase2(self, cp, ud, sp, remaining, last, path):
+        if remaining == 0:
+            return cp == 0 and ud == 0 and sp == 0
+        for m in self._phase2_after[last]:
+            c, u, s = self._cp_move[cp][m], self._ud_move[ud][m], self._sp_move[sp][m]
+            if max(self._corner_slice[c * N_SLICE_PERM + s], self._edge_slice[u * N_SLICE_PERM + s]) < remaining:
+                path.append(m)
+                if self._phase2(c, u, s, remaining - 1, m, path):
+                    return True
+                path.pop()
+        return False
@@ -0,0 +1,196 @@
+import numpy as np
+from src.cube.constants import *
+import src.cube.moves as moves
+from src.cube.cube import (Cube, as_transform, Progress, PROGRESS_A, PROGRESS_B, PROGRESS_A_SOLVED,
+                           PROGRESS_B_SOLVED, CROSS_UNITS, F2L_EDGE_UNITS, F2L_CORNER_UNITS)
+
+class BatchCube:
+    """N cube states held in one set of (N,8) / (N,12) int8 arrays.
+    Row k of every array is cube k; moves are applied to all rows at once.
+    """
+    def __init__(self, n: int):
+        self.n = n
+        self.reset()
+
+    def reset(self):
+        self.corners_pos = np.tile(np.arange(8, dtype=np.int8), (self.n, 1))
+        self.corners_ori = np.zeros((self.n, 8), dtype=np.int8)
+        self.edges_pos = np.tile(np.arange(12, dtype=np.int8), (self.n, 1))
+        self.edges_ori = np.zeros((self.n, 12), dtype=np.int8)
+
+    def __len__(self):
+        return self.n
+
+    @classmethod
+    def from_cubes(cls, cubes):
+        b = cls.__new__(cls)
+        b.n = len(cubes)
+        b.corners_pos = np.array([c.corners_pos for c in cubes], dtype=np.int8).reshape(b.n, 8)
+        b.corners_ori = np.array([c.corners_ori for c in cubes], dtype=np.int8).reshape(b.n, 8)
+        b.edges_pos = np.array([c.edges_pos for c in cubes], dtype=np.int8).reshape(b.n, 12)
+        b.edges_ori = np.array([c.edges_ori for c in cubes], dtype=np.int8).reshape(b.n, 12)
+        return b
+
+    @classmethod
+    def from_buf(cls, buf):
+        """Cubes from (N, 40) int8 rows in the CompactCube.buf layout."""
+        b = cls.__new__(cls)
+        b.n = len(buf)
+        b.corners_pos, b.corners_ori = buf[:, moves.BUF_CP], buf[:, moves.BUF_CO]
+        b.edges_pos, b.edges_ori = buf[:, moves.BUF_EP], buf[:, moves.BUF_EO]
+        return b
+
+    def to_buf(self) -> np.ndarray:
+        """(N, 40) int8 rows in the CompactCube.buf layout."""
+        return np.concatenate([self.corners_pos, self.corners_ori, self.edges_pos, self.edges_ori],
+                              axis=1).astype(np.int8)
+
+    def to_cube(self, i: int) -> Cube:
+        c = Cube()
+        c.corners_pos = self.corners_pos[i].copy()
+        c.corners_ori = self.corners_ori[i].copy()
+        c.edges_pos = self.edges_pos[i].copy()
+        c.edges_ori = self.edges_ori[i].copy()
+        return c
+
+    def copy(self):
+        return self.take(np.arange(self.n))
+
+    def take(self, rows):
+        """Return a new BatchCube holding the given rows (indices or bool mask)."""
+        b = BatchCube.__new__(BatchCube)
+        b.corners_pos = self.corners_pos[rows]
+        b.corners_ori = self.corners_ori[rows]
+        b.edges_pos = self.edges_pos[rows]
+        b.edges_ori = self.edges_ori[rows]
+        b.n = len(b.corners_pos)
+        return b
+
+    def packed_states(self) -> np.ndarray:
+        """(N, 20) uint8 rows; row k's bytes equal Cube.state_key() of cube k."""
+        return np.concatenate([
+            self.corners_pos | (self.corners_ori << 3),
+            self.edges_pos | (self.edges_ori << 4),
+        ], axis=1).astype(np.uint8)
+
+    def state_keys(self) -> list:
+        return [row.tobytes() for row in self.packed_states()]
+
+    # --------------------------------------------------------
+    # Moves
+    # --------------------------------------------------------
+    def apply_moves(self, move_idx):
+        """Apply move_idx[k] (index into MOVE_NAMES) to cube k.
+        A scalar index applies the same move to every cube.
+        """
+        move_idx = np.broadcast_to(np.asarray(move_idx, dtype=np.intp), (self.n,))
+        cp_perm = moves.MOVE_CP[move_idx]
+        ep_perm = moves.MOVE_EP[move_idx]
+        self.corners_pos = np.take_along_axis(self.corners_pos, cp_perm, axis=1)
+        self.corners_ori = (np.take_along_axis(self.corners_ori, cp_perm, axis=1) + moves.MOVE_CO[move_idx]) % 3
+        self.edges_pos = np.take_along_axis(self.edges_pos, ep_perm, axis=1)
+        self.edges_ori = (np.take_along_axis(self.edges_ori, ep_perm, axis=1) + moves.MOVE_EO[move_idx]) % 2
+
+    def apply_sequence(self, move_seq):
+        """Apply the same move string / list to every cube as one compiled transform."""
+        self.apply_transform(moves.compile_moves(move_seq))
+
+    def apply_transform(self, t):
+        cp_perm, co_change, ep_perm, eo_change = t
+        self.corners_pos = self.corners_pos[:, cp_perm]
+        self.corners_ori = (self.corners_ori[:, cp_perm] + co_change) % 3
+        self.edges_pos = self.edges_pos[:, ep_perm]
+        self.edges_ori = (self.edges_ori[:, ep_perm] + eo_change) % 2
+
+    # --------------------------------------------------------
+    # Group Operations (row-wise, see Cube.compose)
+    # --------------------------------------------------------
+    def _rows(self):
+        return (self.corners_pos.astype(np.intp), self.corners_ori,
+                self.edges_pos.astype(np.intp), self.edges_ori)
+
+    def _with_rows(self, cp, co, ep, eo):
+        b = BatchCube.__new__(BatchCube)
+        b.corners_pos, b.corners_ori = cp.astype(np.int8), co.astype(np.int8)
+        b.edges_pos, b.edges_ori = ep.astype(np.int8), eo.astype(np.int8)
+        b.n = len(b.corners_pos)
+        return b
+
+    @staticmethod
+    def _compose_rows(a, b):
+        a_cp, a_co, a_ep, a_eo = a
+        b_cp, b_co, b_ep, b_eo = (np.broadcast_to(x, (len(a_cp),) + np.shape(x)[-1:]) for x in b)
+        return (
+            np.take_along_axis(a_cp, b_cp, axis=1),
+            (np.take_along_axis(a_co, b_cp, axis=1) + b_co) % 3,
+            np.take_along_axis(a_ep, b_ep, axis=1),
+            (np.take_along_axis(a_eo, b_ep, axis=1) + b_eo) % 2,
+        )
+
+    def compose(self, other):
+        """Row-wise self[k] * other[k]; other may also be one cube, move string or transform."""
+        other_t = other._rows() if isinstance(other, BatchCube) else as_transform(other)
+        return self._with_rows(*self._compose_rows(self._rows(), other_t))
+
+    def inverse(self):
+        cp, co, ep, eo = self._rows()
+        cp_inv = np.argsort(cp, axis=1)
+        ep_inv = np.argsort(ep, axis=1)
+        return self._with_rows(
+            cp_inv, (-np.take_along_axis(co, cp_inv, axis=1)) % 3,
+            ep_inv, (-np.take_along_axis(eo, ep_inv, axis=1)) % 2,
+        )
+
+    def conjugate(self, s):
+        """Row-wise s^-1 * self[k] * s for one rotation / transform s."""
+        s = as_transform(s)
+        left = self._compose_rows(tuple(np.broadcast_to(x, (self.n,) + x.shape) for x in moves.invert(s)), self._rows())
+        return self._with_rows(*self._compose_rows(left, s))
+
+    def __mul__(self, other):
+        return self.compose(other)
+
+    def expand(self, move_idx=None):
+        """Return a BatchCube of N * len(move_idx) children, ordered cube-major:
+        child k * M + j is cube k after move_idx[j]. Defaults to all 27 moves.
+        """
+        if move_idx is None:
+            move_idx = np.arange(len(MOVE_NAMES))
+        move_idx = np.asarray(move_idx, dtype=np.intp)
+        children = self.take(np.repeat(np.arange(self.n), len(move_idx)))
+        children.apply_moves(np.tile(move_idx, self.n))
+        return children
+
+    # --------------------------------------------------------
+    # Progress Detectors (same definitions as Cube, one value per row)
+    # --------------------------------------------------------
+    def _edges_solved(self, idx):
+        return (self.edges_pos[:, idx] == idx) & (self.edges_ori[:, idx] == 0)
+
+    def _corners_solved(self, idx):
+        return (self.corners_pos[:, idx] == idx) & (self.corners_ori[:, idx] == 0)
+
+    def progress(self) -> Progress:
+        """(cross, f2l, eo, solved) arrays from the same unit tables as Cube.progress()."""
+        buf = np.concatenate([self.corners_pos, self.corners_ori, self.edges_pos, self.edges_ori], axis=1)
+        u = (buf[:, PROGRESS_A] == PROGRESS_A_SOLVED) & (buf[:, PROGRESS_B] == PROGRESS_B_SOLVED)
+        return Progress(
+            u[:, CROSS_UNITS].sum(axis=1),
+            (u[:, F2L_EDGE_UNITS] & u[:, F2L_CORNER_UNITS]).sum(axis=1),
+            u[:, 20:24].all(axis=1),
+            u[:, 0:20].all(axis=1),
+        )
+
+    def is_solved(self) -> np.ndarray:
+        return self._edges_solved(np.arange(12)).all(axis=1) & self._corners_solved(np.arange(8)).all(axis=1)
+
+    def cross_count(self) -> np.ndarray:
+        return self._edges_solved(np.array([UR, UF, UL, UB])).sum(axis=1)
+
+    def f2l_slots_solved(self) -> np.ndarray:
+        edges = self._edges_solved(np.array([FR, FL, BL, BR]))
+        corners = self._corners_solved(np.array([DFR, DLF, DBL, DRB]))
+        return (edges & corners).sum(axis=1)
+
+    def eo_solved(self) -> np.ndarray:
+        return np.all(self.edges_ori[:, 0:4] == 0, axis=1)
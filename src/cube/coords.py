@@ -0,0 +1,260 @@
+import os
+import itertools
+import numpy as np
+from src.cube.constants import *
+import src.cube.moves as moves
+
+# Coordinate encodings of the cubie state.
+# Every coordinate maps a cube (or a BatchCube, or raw (..., 8) / (..., 12)
+# arrays) to an integer in [0, size) and has a (size, 27) move table built
+# from moves.py, so table[c, m] is the coordinate after MOVE_NAMES[m].
+
+# Saved tables carry this in their file names; bump it whenever the move
+# definitions in moves.py change so stale tables are rebuilt, not loaded.
+TABLE_VERSION = 2
+
+def table_path(table_dir, kind, name):
+    """Path of the saved <kind> table (e.g. 'move', 'pdb') called name."""
+    return os.path.join(table_dir, f"{kind}_{name}.v{TABLE_VERSION}.npy")
+
+_KINDS = {
+    # kind: (pos attribute, ori attribute, number of slots, orientation modulus)
+    'corner': ('corners_pos', 'corners_ori', 8, 3),
+    'edge': ('edges_pos', 'edges_ori', 12, 2),
+}
+
+def _move_arrays(kind, m):
+    """(perm, inverse perm, orientation change) for move m on corners or edges."""
+    if kind == 'corner':
+        perm, dori = moves.MOVE_CP[m], moves.MOVE_CO[m]
+    else:
+        perm, dori = moves.MOVE_EP[m], moves.MOVE_EO[m]
+    return perm, np.argsort(perm), dori
+
+def rank_partial_perm(loc, n):
+    """Rank rows of distinct values loc (N, k) drawn from range(n)."""
+    loc = np.atleast_2d(loc).astype(np.int64)
+    k = loc.shape[1]
+    rank = np.zeros(len(loc), dtype=np.int64)
+    for j in range(k):
+        smaller = (loc[:, :j] < loc[:, j:j + 1]).sum(axis=1)
+        rank = rank * (n - j) + (loc[:, j] - smaller)
+    return rank
+
+def unrank_partial_perm(rank, n, k):
+    """Inverse of rank_partial_perm: (N,) ranks -> (N, k) distinct values."""
+    rank = np.atleast_1d(np.asarray(rank, dtype=np.int64)).copy()
+    digits = np.empty((len(rank), k), dtype=np.int64)
+    for j in reversed(range(k)):
+        digits[:, j] = rank % (n - j)
+        rank //= (n - j)
+    used = np.zeros((len(rank), n), dtype=bool)
+    loc = np.empty((len(rank), k), dtype=np.int64)
+    rows = np.arange(len(rank))
+    for j in range(k):
+        free = ~used
+        hit = (np.cumsum(free, axis=1) == digits[:, j:j + 1] + 1) & free
+        loc[:, j] = np.argmax(hit, axis=1)
+        used[rows, loc[:, j]] = True
+    return loc
+
+
+def rank_combination(loc):
+    """Rank rows of distinct values loc (N, k) as a set (combinatorial number
+    system, order of the values within a row does not matter).
+    """
+    loc = np.sort(np.atleast_2d(loc).astype(np.int64), axis=1)
+    rank = np.zeros(len(loc), dtype=np.int64)
+    for j in range(loc.shape[1]):
+        rank += _binomial(loc[:, j], j + 1)
+    return rank
+
+def _binomial(n, k):
+    n = np.asarray(n, dtype=np.int64)
+    out = np.ones_like(n)
+    for i in range(k):
+        out = out * (n - i) // (i + 1)
+    return np.where(n >= k, out, 0)
+
+def _combinations(n, k):
+    """(C(n, k), k) array whose row r is the sorted set with rank_combination == r."""
+    combos = np.array(list(itertools.combinations(range(n), k)), dtype=np.int64).reshape(-1, k)
+    out = np.empty_like(combos)
+    out[rank_combination(combos)] = combos
+    return out
+
+
+class Coordinate:
+    """Base class: subclasses define size, _state(cube), _encode, _decode and _move."""
+    size = 0
+    MAX_TABLE_SIZE = 50_000_000
+
+    def encode(self, cube):
+        """Coordinate of a Cube (int) or of every row of a BatchCube (array)."""
+        coord = self._encode(self._state(cube))
+        return int(coord[0]) if np.ndim(getattr(cube, 'corners_pos')) == 1 else coord
+
+    def move_table(self, table_dir=None) -> np.ndarray:
+        """(size, 27) int32 table; built once per instance. With table_dir the
+        table is saved there (see table_path) on first build and memory-mapped after.
+        """
+        table = getattr(self, '_table', None)
+        if table is not None:
+            return table
+        path = table_path(table_dir, 'move', self.name) if table_dir else None
+        if path and os.path.exists(path):
+            table = np.load(path, mmap_mode='r')
+        else:
+            if self.size > self.MAX_TABLE_SIZE:
+                raise ValueError(f"{self!r} has {self.size} states, too many for a move table")
+            state = self._decode(np.arange(self.size))
+            table = np.empty((self.size, len(MOVE_NAMES)), dtype=np.int32)
+            for m in range(len(MOVE_NAMES)):
+                table[:, m] = self._encode(self._move(state, m))
+            table.setflags(write=False)
+            if path:
+                _save_atomic(path, table)
+        self._table = table
+        return table
+
+
+def _save_atomic(path, array):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+
+class OrientationCoord(Coordinate):
+    """Twist of all corners (0..2186) or flip of all edges (0..2047), by position.
+    The last slot is implied by the orientation sum.
+    """
+    def __init__(self, kind):
+        self.kind = kind
+        _, _, self.n, self.mod = _KINDS[kind]
+        self.size = self.mod ** (self.n - 1)
+        self._weights = self.mod ** np.arange(self.n - 2, -1, -1, dtype=np.int64)
+
+    def __repr__(self):
+        return f"OrientationCoord({self.kind!r})"
+
+    @property
+    def name(self):
+        return f"{self.kind}_ori"
+
+    def _state(self, cube):
+        return np.atleast_2d(getattr(cube, _KINDS[self.kind][1]))
+
+    def _encode(self, ori):
+        return ori[:, :-1].astype(np.int64) @ self._weights
+
+    def _decode(self, coord):
+        coord = np.atleast_1d(np.asarray(coord, dtype=np.int64))
+        ori = (coord[:, None] // self._weights) % self.mod
+        last = (-ori.sum(axis=1)) % self.mod
+        return np.concatenate([ori, last[:, None]], axis=1)
+
+    def _move(self, ori, m):
+        perm, _, dori = _move_arrays(self.kind, m)
+        return (ori[:, perm] + dori) % self.mod
+
+
+class PieceCoord(Coordinate):
+    """Locations (and optionally orientations) of an ordered subset of pieces.
+    coord = rank(locations) * mod**k + orientation digits, e.g. the four cross
+    edges give 12*11*10*9 * 2**4 = 190,080 states.
+
+    ordered=False keeps only the set of occupied slots (C(n, k) states, no
+    orientation). slots restricts the pieces to a subset of the slots, e.g. the
+    8 U/D edges within the 8 U/D slots (8! states); states with a piece outside
+    slots encode as -1, as do move-table entries of moves that leave the subset.
+    """
+    def __init__(self, kind, pieces, orient=True, ordered=True, slots=None):
+        if orient and not ordered:
+            raise ValueError("orientations need ordered=True")
+        self.kind = kind
+        self.pieces = tuple(int(p) for p in pieces)
+        self.orient = orient
+        self.ordered = ordered
+        _, _, n_slots, self.mod = _KINDS[kind]
+        self.slots = tuple(range(n_slots)) if slots is None else tuple(int(s) for s in slots)
+        self.n = len(self.slots)
+        self._slot_index = np.full(n_slots, -1, dtype=np.int64)
+        self._slot_index[list(self.slots)] = np.arange(self.n)
+        k = len(self.pieces)
+        if ordered:
+            self.perm_size = int(np.prod(np.arange(self.n - k + 1, self.n + 1, dtype=np.int64)))
+        else:
+            self._combos = _combinations(self.n, k)
+            self.perm_size = len(self._combos)
+        self.ori_size = self.mod ** k if orient else 1
+        self.size = self.perm_size * self.ori_size
+        self._weights = self.mod ** np.arange(k - 1, -1, -1, dtype=np.int64)
+
+    def __repr__(self):
+        extra = "" if self.ordered else ", ordered=False"
+        if self.n != _KINDS[self.kind][2]:
+            extra += f", slots={self.slots}"
+        return f"PieceCoord({self.kind!r}, {self.pieces}, orient={self.orient}{extra})"
+
+    @property
+    def name(self):
+        name = f"{self.kind}_{'-'.join(map(str, self.pieces))}" + ("_ori" if self.orient else "")
+        if not self.ordered:
+            name += "_set"
+        if self.n != _KINDS[self.kind][2]:
+            name += f"_in_{'-'.join(map(str, self.slots))}"
+        return name
+
+    def _state(self, cube):
+        pos_attr, ori_attr, _, _ = _KINDS[self.kind]
+        pos = np.atleast_2d(getattr(cube, pos_attr))
+        ori = np.atleast_2d(getattr(cube, ori_attr))
+        # pos[i] is the piece at slot i, so argsort gives the slot of each piece
+        loc = np.argsort(pos, axis=1)[:, self.pieces]
+        return self._slot_index[loc], np.take_along_axis(ori, loc, axis=1)
+
+    def _encode(self, state):
+        loc, ori = state
+        outside = (loc < 0).any(axis=1)
+        loc = np.where(outside[:, None], np.arange(loc.shape[1]), loc)
+        if self.ordered:
+            coord = rank_partial_perm(loc, self.n)
+        else:
+            coord = rank_combination(loc)
+        if self.orient:
+            coord = coord * self.ori_size + ori.astype(np.int64) @ self._weights
+        coord[outside] = -1
+        return coord
+
+    def _decode(self, coord):
+        coord = np.atleast_1d(np.asarray(coord, dtype=np.int64))
+        if self.ordered:
+            loc = unrank_partial_perm(coord // self.ori_size, self.n, len(self.pieces))
+        else:
+            loc = self._combos[coord]
+        ori = (coord[:, None] % self.ori_size // self._weights) % self.mod
+        return loc, ori
+
+    def _move(self, state, m):
+        loc, ori = state
+        _, inv, dori = _move_arrays(self.kind, m)
+        new_slot = inv[np.asarray(self.slots)[loc]]
+        return self._slot_index[new_slot], (ori + dori[new_slot]) % self.mod
+
+
+# Common coordinates
+CO = OrientationCoord('corner')                       # 2187
+EO = OrientationCoord('edge')                         # 2048
+CP = PieceCoord('corner', range(8), orient=False)     # 40320
+EP = PieceCoord('edge', range(12), orient=False)      # 479001600, no move table
+CROSS_EDGES = (UR, UF, UL, UB)
+CROSS = PieceCoord('edge', CROSS_EDGES)               # 190080
+
+# Cross edges and F2L pairs (edge, corner) for a cross built on U (white) or D (yellow)
+CROSS_EDGES_BY_FACE = {'U': (UR, UF, UL, UB), 'D': (DR, DF, DL, DB)}
+F2L_PAIRS_BY_FACE = {
+    'U': {'FR': (FR, URF), 'FL': (FL, UFL), 'BL': (BL, ULB), 'BR': (BR, UBR)},
+    'D': {'FR': (FR, DFR), 'FL': (FL, DLF), 'BL': (BL, DBL), 'BR': (BR, DRB)},
+}
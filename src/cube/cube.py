@@ -1,7 +1,59 @@
+from collections import namedtuple
 import numpy as np
 from src.cube.constants import *
 import src.cube.moves as moves
 
+# Zobrist keys: one random 64-bit word per (slot, piece, orientation).
+# The hash of a state is the XOR of the words of its 20 occupied slots.
+_zobrist_rng = np.random.default_rng(0xA1FAC0BE)
+ZOBRIST_CORNERS = _zobrist_rng.integers(0, 2**63, size=(8, 8, 3), dtype=np.uint64)
+ZOBRIST_EDGES = _zobrist_rng.integers(0, 2**63, size=(12, 12, 2), dtype=np.uint64)
+
+_ID8, _ID12 = np.arange(8), np.arange(12)
+
+def _zobrist(cube) -> int:
+    return int(
+        np.bitwise_xor.reduce(ZOBRIST_CORNERS[_ID8, cube.corners_pos, cube.corners_ori]) ^
+        np.bitwise_xor.reduce(ZOBRIST_EDGES[_ID12, cube.edges_pos, cube.edges_ori])
+    )
+
+SOLVED_BUF = np.concatenate([
+    np.arange(8), np.zeros(8), np.arange(12), np.zeros(12)
+]).astype(np.int8)
+
+# Progress detector tables for BatchCube, over the 40-byte [cp | co | ep | eo]
+# layout of moves.MOVE_BUF_PERM. Each of the 24 units is "buf[A] == SOLVED[A]
+# and buf[B] == SOLVED[B]": units 0-7 are corners and 8-19 edges (right piece,
+# oriented), units 20-23 the orientation of the edges in the U slots (EO).
+PROGRESS_A = np.concatenate([_ID8, 16 + _ID12, 28 + np.arange(UR, UB + 1)])
+PROGRESS_B = np.concatenate([8 + _ID8, 28 + _ID12, 28 + np.arange(UR, UB + 1)])
+PROGRESS_A_SOLVED = SOLVED_BUF[PROGRESS_A]
+PROGRESS_B_SOLVED = SOLVED_BUF[PROGRESS_B]
+
+# Stage metrics as unit indices: cross = U-face edges, F2L slot k = middle
+# edge F2L_EDGE_UNITS[k] together with D corner F2L_CORNER_UNITS[k].
+CROSS_UNITS = [8 + e for e in (UR, UF, UL, UB)]
+F2L_EDGE_UNITS = [8 + e for e in (FR, FL, BL, BR)]
+F2L_CORNER_UNITS = [DFR, DLF, DBL, DRB]
+
+# The same checks for single cubes: cross edges, and (edge, corner) per F2L slot
+CROSS_EDGES = (UR, UF, UL, UB)
+F2L_SLOTS = ((FR, DFR), (FL, DLF), (BL, DBL), (BR, DRB))
+_ORIENTED_U = bytes(4)
+SOLVED_LIST = SOLVED_BUF.tolist()
+
+Progress = namedtuple('Progress', ['cross', 'f2l', 'eo', 'solved'])
+
+def as_transform(x):
+    """(cp, co, ep, eo) of a Cube / CompactCube (its state read as the transform
+    from solved), of a move string, or of a transform tuple.
+    """
+    if isinstance(x, str):
+        return moves.compile_moves(x)
+    if isinstance(x, tuple):
+        return x
+    return (x.corners_pos.astype(np.intp), x.corners_ori, x.edges_pos.astype(np.intp), x.edges_ori)
+
 class Cube:
     def __init__(self):
         self.reset()
@@ -24,6 +76,66 @@ class Cube:
         c.edges_ori = self.edges_ori.copy()
         return c
 
+    # --------------------------------------------------------
+    # Hashing
+    # --------------------------------------------------------
+    @property
+    def zobrist(self) -> int:
+        """64-bit Zobrist hash of the current state, computed on access so moves
+        stay a bare gather and direct array assignment never leaves it stale.
+        """
+        return _zobrist(self)
+
+    def state_key(self) -> bytes:
+        """Packed 20-byte canonical key: one byte per slot, piece | ori << 3 for
+        corners and piece | ori << 4 for edges. Equal states give equal keys.
+        """
+        return (
+            (self.corners_pos | (self.corners_ori << 3)).astype(np.uint8).tobytes() +
+            (self.edges_pos | (self.edges_ori << 4)).astype(np.uint8).tobytes()
+        )
+
+    def __eq__(self, other):
+        # Cube and CompactCube compare (and hash) by state alone
+        if not isinstance(other, (Cube, CompactCube)):
+            return NotImplemented
+        return self.state_key() == other.state_key()
+
+    def __hash__(self):
+        # Don't mutate a cube while it is used as a dict / set key.
+        return hash(self.state_key())
+
+    # --------------------------------------------------------
+    # Group Operations
+    # --------------------------------------------------------
+    # A state is the transform that takes the solved cube to it, so
+    # a * b is the state reached by applying b's moves after a's.
+    @classmethod
+    def from_transform(cls, t):
+        c = cls()
+        c.corners_pos = t[0].astype(np.int8)
+        c.corners_ori = np.asarray(t[1], dtype=np.int8).copy()
+        c.edges_pos = t[2].astype(np.int8)
+        c.edges_ori = np.asarray(t[3], dtype=np.int8).copy()
+        return c
+
+    def compose(self, other):
+        """self * other: other may be a cube, a move string or a transform."""
+        return type(self).from_transform(moves.compose(as_transform(self), as_transform(other)))
+
+    def inverse(self):
+        """The state that undoes this one: self * self.inverse() is solved."""
+        return type(self).from_transform(moves.invert(as_transform(self)))
+
+    def conjugate(self, s):
+        """s^-1 * self * s, e.g. the same case seen after the rotation s ("y")."""
+        s = as_transform(s)
+        return type(self).from_transform(
+            moves.compose(moves.compose(moves.invert(s), as_transform(self)), s))
+
+    def __mul__(self, other):
+        return self.compose(other)
+
     def is_solved(self) -> bool:
         return (
             np.array_equal(self.corners_pos, np.arange(8, dtype=np.int8)) and
@@ -42,149 +154,213 @@ class Cube:
         U D L R F B (+ ' or 2)
         x y z (+ ' or 2)
         """
-        # Parse move
-        base_move = move[0]
-        modifier = move[1] if len(move) > 1 else ""
-        
-        times = 1
-        if modifier == "'":
-            times = 3
-        elif modifier == "2":
-            times = 2
-            
-        self.history.append(move)
-        # Get permutation logic from moves.py
-        # We perform the single move 'times' times
-        # Ideally moves.py defines the single move permutation
-        
-        for _ in range(times):
-             self._apply_single_move(base_move)
-             
-    def _apply_single_move(self, move_name):
-        """Applies a single basic move (U, D, L, R, F, B, x, y, z)"""
-        if move_name not in moves.MOVES:
-            raise ValueError(f"Unknown move: {move_name}")
-            
-        move_data = moves.MOVES[move_name]
-        
-        # Apply Corner Permutation
-        # new_corners[i] = old_corners[P[i]]
-        # We need to use fancy indexing carefully or a temp array
-        # moves.CP is a list/array where index i gets the piece FROM CP[i]
-        # Wait, usually P[i] is "where piece i GOES" or "where piece at i COMES FROM"?
-        # Let's say moves.CP[i] is the NEW position of the piece currently at i.
-        # Then new_pos[CP[i]] = old_pos[i].
-        # If moves.CP[i] is "the old index that moves to i", then new_pos[i] = old_pos[CP[i]].
-        # I will implement moves.py such that CP[i] is the index of the piece that moves TO i. 
-        # So new_pos[i] = old_pos[CP[i]]
-        
-        cp_perm = move_data['cp']
+        idx = moves.MOVE_INDEX.get(move)
+        if idx is None:
+            raise ValueError(f"Unknown move: {move}")
+        self.apply_move_idx(idx)
+
+    def apply_move_idx(self, idx: int):
+        """Apply MOVE_NAMES[idx] using the precomposed tables in moves.py.
+        One gather per array, no string parsing.
+        """
+        self.history.append(MOVE_NAMES[idx])
+
+        cp_perm = moves.MOVE_CP[idx]
+        ep_perm = moves.MOVE_EP[idx]
+        self.corners_pos = self.corners_pos[cp_perm]
+        self.corners_ori = (self.corners_ori[cp_perm] + moves.MOVE_CO[idx]) % 3
+        self.edges_pos = self.edges_pos[ep_perm]
+        self.edges_ori = (self.edges_ori[ep_perm] + moves.MOVE_EO[idx]) % 2
+
+    def apply_sequence(self, move_seq):
+        """Apply a whole move string or list of moves as one compiled transform."""
+        names = moves.parse_moves(move_seq) if isinstance(move_seq, str) else list(move_seq)
+        self.apply_transform(moves.compile_moves(names))
+        self.history.extend(names)
+
+    def apply_transform(self, t):
+        """Apply a (cp, co, ep, eo) transform, e.g. from moves.compile_moves."""
+        cp_perm, co_change, ep_perm, eo_change = t
         self.corners_pos = self.corners_pos[cp_perm]
-        
-        # Apply Corner Orientation
-        # new_ori[i] = (old_ori[CP[i]] + move_ori[i]) % 3
-        # Note: move_ori is defined on the destination slots
-        co_change = move_data['co']
         self.corners_ori = (self.corners_ori[cp_perm] + co_change) % 3
-        
-        # Apply Edge Permutation
-        ep_perm = move_data['ep']
         self.edges_pos = self.edges_pos[ep_perm]
-        
-        # Apply Edge Orientation
-        # new_ori[i] = (old_ori[EP[i]] + move_ori[i]) % 2
-        eo_change = move_data['eo']
         self.edges_ori = (self.edges_ori[ep_perm] + eo_change) % 2
 
 
     # --------------------------------------------------------
     # CFOP / ZB Progress Detectors (used for reward shaping)
     # --------------------------------------------------------
+    # A piece counts as solved when the right piece sits in its home slot
+    # with orientation 0. The white cross is built on U (edges UR UF UL UB),
+    # F2L slots pair the middle-layer edges with the D corners, and EO looks
+    # at whatever edges currently sit in the U slots.
+    # The state arrays hold 8-12 entries, where each numpy call costs more
+    # than the comparisons themselves: each detector converts only the arrays
+    # it reads to Python ints and checks just its own slots.
+    def _state_list(self) -> list:
+        """The state as 40 ints in the [cp | co | ep | eo] buffer layout."""
+        return (self.corners_pos.tolist() + self.corners_ori.tolist() +
+                self.edges_pos.tolist() + self.edges_ori.tolist())
+
+    def progress(self) -> Progress:
+        """All stage metrics in one call: (cross, f2l, eo, solved)."""
+        s = self._state_list()
+        ep, eo = s[16:28], s[28:40]
+        cross = 0
+        for e in CROSS_EDGES:
+            if ep[e] == e and not eo[e]:
+                cross += 1
+        f2l = 0
+        for e, c in F2L_SLOTS:
+            if ep[e] == e and s[c] == c and not eo[e] and not s[8 + c]:
+                f2l += 1
+        return Progress(cross, f2l, not any(eo[UR:UB + 1]), s == SOLVED_LIST)
+
     def cross_count(self) -> int:
-        """Return number of correctly solved cross edges (0..4).
-        Standard Cross: DF, DF, DL, DB (White edges on bottom).
-        Positions: DF=5, DR=4, DL=6, DB=7 ??
-        Need to verify indices in constants.py
-        """
-        # Assuming White is Down (D face) for solution? 
-        # Standard color scheme: White U, Green F?
-        # WCA: White Top, Green Front.
-        # Cross usually done on White. So White on Top?
-        # Speedcubers do cross on Bottom (White Down).
-        # Re-check constants.py or assume standard mapping
-        # Let's assume 'Solved' state has White on U.
-        # So 'Cross' usually means the D-layer edges if doing CFOP?
-        # No, if is_solved() expects White on U (indices 0-3?), then Cross on D means solving the D-face edges.
-        # But wait, standard solved state usually implies White U, Green F.
-        # If we solve cross on D, we are looking for the edges belonging to D face.
-        # D face edges: DR(4), DF(5), DL(6), DB(7).
-        # We count how many of these are solved.
-        
-        # A piece is solved if:
-        # 1. It is in the correct position (pos[i] == i)
-        # 2. It has correct orientation (ori[i] == 0)
-        
-        # We solve the White Cross on the U face (pieces 0, 1, 2, 3)
+        """Return number of correctly solved cross edges (0..4)."""
+        ep, eo = self.edges_pos.tolist(), self.edges_ori.tolist()
         count = 0
-        for i in [0, 1, 2, 3]: # UR, UF, UL, UB
-            if self.edges_pos[i] == i and self.edges_ori[i] == 0:
+        for e in CROSS_EDGES:
+            if ep[e] == e and not eo[e]:
                 count += 1
         return count
 
     def f2l_slots_solved(self) -> int:
-        """Return number of solved F2L slots (0..4).
-        Slots are the 4 vertical edges between D and U layers + their corresponding corners.
-        Edges: FR(8), FL(9), BL(10), BR(11).
-        Corners: DFR(4), DLF(5), DBL(6), DRB(7).
-        """
+        """Return number of solved F2L slots (0..4): FR+DFR, FL+DLF, BL+DBL, BR+DRB."""
+        ep, eo = self.edges_pos.tolist(), self.edges_ori.tolist()
+        cp, co = self.corners_pos.tolist(), self.corners_ori.tolist()
         count = 0
-        # Slot 1: FR (Edge 8) + DFR (Corner 4)
-        if (self.edges_pos[8] == 8 and self.edges_ori[8] == 0 and
-            self.corners_pos[4] == 4 and self.corners_ori[4] == 0):
-            count += 1
-            
-        # Slot 2: FL (Edge 9) + DLF (Corner 5)
-        if (self.edges_pos[9] == 9 and self.edges_ori[9] == 0 and
-            self.corners_pos[5] == 5 and self.corners_ori[5] == 0):
-            count += 1
-            
-        # Slot 3: BL (Edge 10) + DBL (Corner 6)
-        if (self.edges_pos[10] == 10 and self.edges_ori[10] == 0 and
-            self.corners_pos[6] == 6 and self.corners_ori[6] == 0):
-            count += 1
-            
-        # Slot 4: BR (Edge 11) + DRB (Corner 7)
-        if (self.edges_pos[11] == 11 and self.edges_ori[11] == 0 and
-            self.corners_pos[7] == 7 and self.corners_ori[7] == 0):
-            count += 1
-            
+        for e, c in F2L_SLOTS:
+            if ep[e] == e and cp[c] == c and not eo[e] and not co[c]:
+                count += 1
         return count
 
     def eo_solved(self) -> bool:
-        """Return True if all last-layer edges are oriented.
-        Last Layer (LL) is U face (since Cross is on D).
-        LL Edges: UR(0), UF(1), UL(2), UB(3).
-        Orientation 0 means oriented (Good).
-        """
-        for i in [0, 1, 2, 3]:
-            if self.edges_ori[i] != 0: # Checks current orientation of piece at U spots?
-                # Wait, if we are just checking EO of the pieces CURRENTLY in U layer?
-                # ZBLL uses EO detection.
-                # Usually means 'Are the edges currently on the U face oriented correctly relative to U?'
-                # With our encoding, '0' is the solved orientation.
-                # If a piece is on U face, and its orientation is 0, it is oriented.
-                pass
-        
-        # But we also need to ensure the pieces ON the U layer are actually the U-layer pieces?
-        # No, EO for ZBLL usually implies we are at the LL stage, so F2L is done.
-        # If F2L is done, the pieces in U layer ARE the U layer pieces.
-        # BUT, the function might be called anytime.
-        # "Return True if all last-layer edges are oriented"
-        # If F2L is not done, this metric might be noisy, but technically EO can be tracked.
-        # Let's check the orientation of whichever pieces are in the U slots.
-        
-        # IMPORTANT: Our orientation definition is relative to the piece's solved state.
-        # If a U-layer piece is in the U-layer, ori=0 means Good.
-        # So we just check self.edges_ori[0..3].
-        
-        return np.all(self.edges_ori[0:4] == 0)
+        """Return True if the edges in the last-layer (U) slots are all oriented."""
+        return self.edges_ori[UR:UB + 1].tobytes() == _ORIENTED_U
+
+class CompactCube:
+    """History-free cube for search frontiers and rollouts.
+    The whole state lives in one 40-byte int8 buffer ([cp | co | ep | eo]);
+    corners_pos etc. are views into it, so code written against Cube works
+    unchanged. Moves are recorded only when record_history=True.
+    """
+    __slots__ = ('buf', 'history', 'record_history')
+
+    def __init__(self, record_history: bool = False):
+        self.buf = SOLVED_BUF.copy()
+        self.history = []
+        self.record_history = record_history
+
+    def reset(self):
+        self.buf[:] = SOLVED_BUF
+        self.history = []
+
+    def copy(self):
+        c = CompactCube.__new__(CompactCube)
+        c.buf = self.buf.copy()
+        c.history = self.history.copy() if self.record_history else []
+        c.record_history = self.record_history
+        return c
+
+    @classmethod
+    def from_cube(cls, cube, record_history: bool = False):
+        c = cls(record_history)
+        c.buf[moves.BUF_CP], c.buf[moves.BUF_CO] = cube.corners_pos, cube.corners_ori
+        c.buf[moves.BUF_EP], c.buf[moves.BUF_EO] = cube.edges_pos, cube.edges_ori
+        return c
+
+    @classmethod
+    def from_transform(cls, t):
+        c = cls()
+        c.corners_pos, c.corners_ori = t[0], t[1]
+        c.edges_pos, c.edges_ori = t[2], t[3]
+        return c
+
+    compose = Cube.compose
+    inverse = Cube.inverse
+    conjugate = Cube.conjugate
+    __mul__ = Cube.__mul__
+
+    def to_cube(self) -> Cube:
+        c = Cube()
+        c.corners_pos = self.corners_pos.copy()
+        c.corners_ori = self.corners_ori.copy()
+        c.edges_pos = self.edges_pos.copy()
+        c.edges_ori = self.edges_ori.copy()
+        c.history = list(self.history)
+        return c
+
+    # Views into the buffer
+    def _view(sl):
+        def get(self):
+            return self.buf[sl]
+        def set(self, value):
+            self.buf[sl] = value
+        return property(get, set)
+
+    corners_pos = _view(moves.BUF_CP)
+    corners_ori = _view(moves.BUF_CO)
+    edges_pos = _view(moves.BUF_EP)
+    edges_ori = _view(moves.BUF_EO)
+    del _view
+
+    # --------------------------------------------------------
+    # Hashing
+    # --------------------------------------------------------
+    def state_key(self) -> bytes:
+        """Same 20-byte key as Cube.state_key()."""
+        b = self.buf
+        return (
+            (b[moves.BUF_CP] | (b[moves.BUF_CO] << 3)).astype(np.uint8).tobytes() +
+            (b[moves.BUF_EP] | (b[moves.BUF_EO] << 4)).astype(np.uint8).tobytes()
+        )
+
+    __eq__ = Cube.__eq__
+    __hash__ = Cube.__hash__
+
+    # --------------------------------------------------------
+    # Moves
+    # --------------------------------------------------------
+    def apply_move(self, move: str):
+        idx = moves.MOVE_INDEX.get(move)
+        if idx is None:
+            raise ValueError(f"Unknown move: {move}")
+        self.apply_move_idx(idx)
+
+    def apply_move_idx(self, idx: int):
+        b = self.buf[moves.MOVE_BUF_PERM[idx]]
+        b += moves.MOVE_BUF_DELTA[idx]
+        b[moves.BUF_CO] %= 3
+        b[moves.BUF_EO] %= 2
+        self.buf = b
+        if self.record_history:
+            self.history.append(MOVE_NAMES[idx])
+
+    def apply_sequence(self, move_seq):
+        """Apply a whole move string or list of moves as one compiled transform."""
+        if self.record_history:
+            names = moves.parse_moves(move_seq) if isinstance(move_seq, str) else list(move_seq)
+            self.apply_transform(moves.compile_moves(names))
+            self.history.extend(names)
+        else:
+            self.apply_transform(moves.compile_moves(move_seq))
+
+    def apply_transform(self, t):
+        cp_perm, co_change, ep_perm, eo_change = t
+        b = self.buf.copy()
+        b[moves.BUF_CP], b[moves.BUF_CO] = self.corners_pos[cp_perm], (self.corners_ori[cp_perm] + co_change) % 3
+        b[moves.BUF_EP], b[moves.BUF_EO] = self.edges_pos[ep_perm], (self.edges_ori[ep_perm] + eo_change) % 2
+        self.buf = b
+
+    def is_solved(self) -> bool:
+        return np.array_equal(self.buf, SOLVED_BUF)
+
+    # Progress detectors only read the state arrays, so share Cube's
+    def _state_list(self) -> list:
+        return self.buf.tolist()
+
+    progress = Cube.progress
+    cross_count = Cube.cross_count
+    f2l_slots_solved = Cube.f2l_slots_solved
+    eo_solved = Cube.eo_solved
@@ -2,8 +2,11 @@ import json
 import os
 import numpy as np
 
+# The goal definitions ship next to this module
+DEFAULT_GOALS_DIR = os.path.dirname(__file__)
+
 class GoalManager:
-    def __init__(self, goals_dir="src/cube/goals"):
+    def __init__(self, goals_dir=DEFAULT_GOALS_DIR):
         self.goals = {}
         self.goals_dir = goals_dir
         self.load_goals()
@@ -47,6 +50,18 @@ class GoalManager:
 
         return score / total_parts
 
+    def reached(self, cube, goal_name):
+        """True when every required piece is in place and oriented, i.e.
+        score_state(cube, goal_name) == 1.0. Row-wise bool array for a BatchCube.
+        """
+        goal = self.goals[goal_name]
+        done = np.ones(np.shape(cube.edges_pos)[:-1], dtype=bool)
+        for req in goal.get('required_edges', []):
+            done &= (cube.edges_pos[..., req['pos']] == req['id']) & (cube.edges_ori[..., req['pos']] == req['ori'])
+        for req in goal.get('required_corners', []):
+            done &= (cube.corners_pos[..., req['pos']] == req['id']) & (cube.corners_ori[..., req['pos']] == req['ori'])
+        return done
+
     def get_visual(self, goal_name):
         if goal_name in self.goals:
             return "\n".join(self.goals[goal_name].get('visual', []))
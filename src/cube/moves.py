@@ -1,4 +1,7 @@
+import re
+from functools import lru_cache
 import numpy as np
+from src.cube.constants import MOVE_NAMES
 
 # Indices for reference from constants.py (conceptually)
 # Corners: 0:URF, 1:UFL, 2:ULB, 3:UBR, 4:DFR, 5:DLF, 6:DBL, 7:DRB
@@ -62,23 +65,23 @@ MOVES['D'] = {
 # 5->6: Twist +1 ?
 # 6->2: Twist +1 ?
 # 2->1: Twist +1 ? -> Sum 4? No.
-# Standard algs say: 
-# 1(UFL) -> 5(DLF) : CW (+1). U sticker goes to F (which is 'side' for D corners. D is 'good').
-# 5(DLF) -> 6(DBL) : CCW (-1 aka +2).
-# 6(DBL) -> 2(ULB) : CW (+1).
-# 2(ULB) -> 1(UFL) : CCW (-1 aka +2).
-# Sum: 1 + 2 + 1 + 2 = 6 = 0 mod 3. Correct.
+# Same twist convention as R, F and B (Kociemba's cubie tables):
+# 1(UFL) -> 5(DLF) : +2.
+# 5(DLF) -> 6(DBL) : +1.
+# 6(DBL) -> 2(ULB) : +2.
+# 2(ULB) -> 1(UFL) : +1.
+# Sum: 2 + 1 + 2 + 1 = 6 = 0 mod 3. Correct.
 MOVES['L'] = {
     'cp': np.array([0, 2, 6, 3, 4, 1, 5, 7]), # 1<-2, 5<-1, 6<-5, 2<-6
-    'co': np.array([0, 2, 1, 0, 0, 1, 2, 0]), # Dest 1 gets +2? 
+    'co': np.array([0, 1, 2, 0, 0, 2, 1, 0]),
     # Logic: New orientation at dest i = (Old orientation at src + Twist) % 3
-    # Wait, co array here is 'Twist applied to the piece landing at i'.
-    # Piece at 2 moves to 1. 2->1 is Twist +2. So at dest 1, we add +2.
-    # Piece at 1 moves to 5. 1->5 is Twist +1. So at dest 5, we add +1.
-    # Piece at 5 moves to 6. 5->6 is Twist +2. So at dest 6, we add +2.
-    # Piece at 6 moves to 2. 6->2 is Twist +1. So at dest 2, we add +1.
+    # co array here is 'Twist applied to the piece landing at i'.
+    # Piece at 2 moves to 1. 2->1 is Twist +1. So at dest 1, we add +1.
+    # Piece at 1 moves to 5. 1->5 is Twist +2. So at dest 5, we add +2.
+    # Piece at 5 moves to 6. 5->6 is Twist +1. So at dest 6, we add +1.
+    # Piece at 6 moves to 2. 6->2 is Twist +2. So at dest 2, we add +2.
     # Indices: 0 1 2 3 4 5 6 7
-    # Values:  0 2 1 0 0 1 2 0
+    # Values:  0 1 2 0 0 2 1 0
     'ep': np.array([0, 1, 6, 3, 4, 5, 10, 7, 8, 2, 9, 11]), # 2<-6? No.
     # Cycle: 2(UL) -> 9(FL) -> 6(DL) -> 10(BL) -> 2(UL)
     # dest 2 gets 10. dest 9 gets 2. dest 6 gets 9. dest 10 gets 6.
@@ -131,17 +134,17 @@ MOVES['R'] = {
 
 # F Move (Front)
 # Cycles: Corners (1 0 4 5) -> UFL->URF->DFR->DLF->UFL
-# 0(URF)->4(DFR): Twist +1
-# 4(DFR)->5(DLF): Twist +2
-# 5(DLF)->1(UFL): Twist +1
-# 1(UFL)->0(URF): Twist +2
-# Dest 4 gets 0 (+1). Dest 5 gets 4 (+2). Dest 1 gets 5 (+1). Dest 0 gets 1 (+2).
+# 0(URF)->4(DFR): Twist +2
+# 4(DFR)->5(DLF): Twist +1
+# 5(DLF)->1(UFL): Twist +2
+# 1(UFL)->0(URF): Twist +1
+# Dest 4 gets 0 (+2). Dest 5 gets 4 (+1). Dest 1 gets 5 (+2). Dest 0 gets 1 (+1).
 # Edges: UF(1) -> FR(8) -> DF(5) -> FL(9) -> UF(1)
 # dest 1 gets 9. dest 8 gets 1. dest 5 gets 8. dest 9 gets 5.
 # EO: F/B turns flips edges (val 1).
 MOVES['F'] = {
     'cp': np.array([1, 5, 2, 3, 0, 4, 6, 7]), # 0<-1, 4<-0, 5<-4, 1<-5
-    'co': np.array([2, 1, 0, 0, 1, 2, 0, 0]),
+    'co': np.array([1, 2, 0, 0, 2, 1, 0, 0]),
     'ep': np.array([0, 9, 2, 3, 4, 8, 6, 7, 1, 5, 10, 11]),
     'eo': np.array([0, 1, 0, 0, 0, 1, 0, 0, 1, 1, 0, 0]) # 1, 8, 5, 9 get flip
 }
@@ -174,7 +177,7 @@ MOVES['B'] = {
 # L-layer cycle: 1->2->6->5->1 (Same dir as R)
 # Twist logic same as R.
 # Edges: (0 11 4 8) (R-def) AND (2 10 6 9) (L-def but parallel) AND (1 3 7 5) (M slice)
-# EO: No EO change on rotation.
+# EO: like a slice move, the M-slice edges flip (their U/D sticker ends up on F/B).
 MOVES['x'] = {
     'cp': np.array([4, 5, 1, 0, 7, 6, 2, 3]), # 0<-4, 3<-0... 1<-5, 2<-1, 6<-2, 5<-6
     'co': np.array([2, 1, 2, 1, 1, 2, 1, 2]),
@@ -226,16 +229,18 @@ MOVES['x'] = {
     'eo': np.zeros(12, dtype=np.int8) 
 }
 MOVES['x']['ep'] = np.array([8, 5, 9, 1, 11, 7, 10, 3, 4, 6, 2, 0])
+MOVES['x']['eo'] = np.array([0, 1, 0, 1, 0, 1, 0, 1, 0, 0, 0, 0])   # UF, UB, DF, DB
 
 # y Rotation (Follows U)
 # Corners: (0 1 2 3) and (4 5 6 7)
 # Edges: (0 1 2 3) and (4 5 6 7) and (8 9 10 11)
 # Simply U and D' (D prime moves same way as U). And E slice.
+# EO: the E-slice edges flip (their F/B sticker ends up on R/L).
 MOVES['y'] = {
     'cp': np.array([3, 0, 1, 2, 7, 4, 5, 6]),
     'co': np.zeros(8, dtype=np.int8),
     'ep': np.array([3, 0, 1, 2, 7, 4, 5, 6, 11, 8, 9, 10]),
-    'eo': np.zeros(12, dtype=np.int8)
+    'eo': np.array([0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 1, 1])
 }
 
 # z Rotation (Follows F)
@@ -278,3 +283,209 @@ MOVES['z'] = {
     'ep': np.array([2, 9, 6, 10, 0, 8, 4, 11, 1, 5, 7, 3]),
     'eo': np.array([1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1])
 }
+
+# =============================================================================
+# PRECOMPOSED MOVE TABLES
+# =============================================================================
+# One row per entry of constants.MOVE_NAMES (primes and doubles included), so
+# any move is a single gather per array:
+#   new_pos[i] = old_pos[MOVE_CP[m, i]]
+#   new_ori[i] = (old_ori[MOVE_CP[m, i]] + MOVE_CO[m, i]) % 3
+
+def compose(a, b):
+    """Return the (cp, co, ep, eo) transform of applying a, then b."""
+    a_cp, a_co, a_ep, a_eo = a
+    b_cp, b_co, b_ep, b_eo = b
+    return (
+        a_cp[b_cp],
+        ((a_co[b_cp] + b_co) % 3).astype(np.int8),
+        a_ep[b_ep],
+        ((a_eo[b_ep] + b_eo) % 2).astype(np.int8),
+    )
+
+def invert(t):
+    """Return the transform that undoes t: compose(t, invert(t)) is the identity."""
+    cp, co, ep, eo = t
+    cp_inv = np.argsort(cp)
+    ep_inv = np.argsort(ep)
+    return (
+        cp_inv,
+        ((-co[cp_inv]) % 3).astype(np.int8),
+        ep_inv,
+        ((-eo[ep_inv]) % 2).astype(np.int8),
+    )
+
+def _base_transform(name):
+    m = MOVES[name]
+    return (
+        np.asarray(m['cp'], dtype=np.intp),
+        np.asarray(m['co'], dtype=np.int8),
+        np.asarray(m['ep'], dtype=np.intp),
+        np.asarray(m['eo'], dtype=np.int8),
+    )
+
+def _build_move_tables():
+    cps, cos, eps, eos = [], [], [], []
+    for name in MOVE_NAMES:
+        times = {"'": 3, "2": 2}.get(name[1:], 1)
+        t = _base_transform(name[0])
+        for _ in range(times - 1):
+            t = compose(t, _base_transform(name[0]))
+        cps.append(t[0]); cos.append(t[1]); eps.append(t[2]); eos.append(t[3])
+    return np.array(cps), np.array(cos), np.array(eps), np.array(eos)
+
+MOVE_CP, MOVE_CO, MOVE_EP, MOVE_EO = _build_move_tables()
+for _table in (MOVE_CP, MOVE_CO, MOVE_EP, MOVE_EO):
+    _table.setflags(write=False)
+
+MOVE_INDEX = {name: i for i, name in enumerate(MOVE_NAMES)}
+
+# Same tables over a single 40-byte state buffer laid out as
+# [cp(8) | co(8) | ep(12) | eo(12)], used by CompactCube:
+#   buf = buf[MOVE_BUF_PERM[m]] + MOVE_BUF_DELTA[m], then co %= 3, eo %= 2
+BUF_CP, BUF_CO, BUF_EP, BUF_EO = slice(0, 8), slice(8, 16), slice(16, 28), slice(28, 40)
+
+MOVE_BUF_PERM = np.concatenate([MOVE_CP, MOVE_CP + 8, MOVE_EP + 16, MOVE_EP + 28], axis=1)
+MOVE_BUF_DELTA = np.concatenate([
+    np.zeros_like(MOVE_CO), MOVE_CO, np.zeros_like(MOVE_EO), MOVE_EO
+], axis=1).astype(np.int8)
+for _table in (MOVE_BUF_PERM, MOVE_BUF_DELTA):
+    _table.setflags(write=False)
+
+# =============================================================================
+# MOVE SEQUENCES
+# =============================================================================
+
+def parse_moves(move_str):
+    # Remove comments and garbage
+    move_str = re.sub(r"//.*", "", move_str)
+    move_str = re.sub(r"\(.*?\)", "", move_str).replace("|", "").replace("  ", " ")
+    
+    # Split handles spaces and newlines
+    raw_moves = move_str.split()
+    
+    parsed = []
+    for m in raw_moves:
+        if m == "" or m == " " or "//" in m: continue
+        
+        # Handle wide moves (e.g. r -> x L, r' -> x' L')
+        if m.startswith('r'):
+             if "'" in m: parsed.extend(["x'", "L'"])
+             elif "2" in m: parsed.extend(['x2', "L2"])
+             else: parsed.extend(['x', "L"])
+        elif m.startswith('l'):
+             if "'" in m: parsed.extend(["x", "R'"])
+             elif "2" in m: parsed.extend(["x2", "R2"])
+             else: parsed.extend(["x'", "R"])
+        elif m.startswith('u'):
+             if "'" in m: parsed.extend(["y'", "D'"])
+             elif "2" in m: parsed.extend(["y2", "D2"])
+             else: parsed.extend(["y", "D"])
+        elif m.startswith('d'):
+             if "'" in m: parsed.extend(["y", "U'"])
+             elif "2" in m: parsed.extend(["y2", "U2"])
+             else: parsed.extend(["y'", "U"])
+        elif m.startswith('f'):
+             if "'" in m: parsed.extend(["z'", "B'"])
+             elif "2" in m: parsed.extend(["z2", "B2"])
+             else: parsed.extend(["z", "B"])
+        elif m.startswith('b'):
+             if "'" in m: parsed.extend(["z", "F'"])
+             elif "2" in m: parsed.extend(["z2", "F2"])
+             else: parsed.extend(["z'", "F"])
+        elif m in ["M", "M'", "M2"]:
+            # M follows L direction
+            if m == "M": parsed.extend(["x'", "R", "L'"])
+            elif m == "M'": parsed.extend(["x", "R'", "L"])
+            elif m == "M2": parsed.extend(["x2", "R2", "L2"])
+        else:
+            # Handle standard moves, normalize ' to '
+            m = m.replace("’", "'")
+            # If it's a valid move, use it
+            if m in MOVE_NAMES:
+                parsed.append(m)
+            elif m.lower() in [name.lower() for name in MOVE_NAMES]:
+                # find the correct case
+                for name in MOVE_NAMES:
+                    if name.lower() == m.lower():
+                        parsed.append(name)
+                        break
+    return parsed
+
+IDENTITY = (
+    np.arange(8, dtype=np.intp), np.zeros(8, dtype=np.int8),
+    np.arange(12, dtype=np.intp), np.zeros(12, dtype=np.int8),
+)
+
+def compile_moves(move_seq):
+    """Compile a move string (anything parse_moves accepts, including wide
+    moves, slices and rotations) or a list of MOVE_NAMES into one
+    (cp, co, ep, eo) transform. Results are LRU-cached and read-only.
+    """
+    if isinstance(move_seq, str):
+        return _compile_string(move_seq)
+    return _compile_names(tuple(move_seq))
+
+@lru_cache(maxsize=4096)
+def _compile_string(move_str):
+    return _compile_names(tuple(parse_moves(move_str)))
+
+@lru_cache(maxsize=4096)
+def _compile_names(names):
+    t = IDENTITY
+    for name in names:
+        idx = MOVE_INDEX.get(name)
+        if idx is None:
+            raise ValueError(f"Unknown move: {name}")
+        t = compose(t, (MOVE_CP[idx], MOVE_CO[idx], MOVE_EP[idx], MOVE_EO[idx]))
+    for a in t:
+        a.setflags(write=False)
+    return t
+
+# =============================================================================
+# CANONICAL SEQUENCES
+# =============================================================================
+# CANONICAL_NEXT[second_last, last] is the (27,) mask of moves allowed next,
+# with NO_MOVE standing in before the first moves. A move is pruned when it
+#   - turns the same face (or rotates about the same axis) as the last move,
+#   - commutes with the last move but comes earlier in MOVE_NAMES, so U D is
+#     kept and D U is not, or
+#   - turns the same face as the second-to-last move while the last move
+#     commutes with it (U D U).
+# Commutation is checked on the transforms above, so it follows the
+# simulator's conventions (every face turn commutes with the rotation about
+# its axis, e.g. R and L with x).
+# CANONICAL_NEXT_FACES is the same table with the rotations masked out.
+NO_MOVE = len(MOVE_NAMES)
+
+def _build_canonical_table():
+    n = len(MOVE_NAMES)
+    t = [(MOVE_CP[m], MOVE_CO[m], MOVE_EP[m], MOVE_EO[m]) for m in range(n)]
+    commute = np.array([[all((x == y).all() for x, y in zip(compose(t[a], t[b]), compose(t[b], t[a])))
+                         for b in range(n)] for a in range(n)])
+    commute = np.pad(commute, ((0, 1), (0, 1)))       # NO_MOVE commutes with nothing
+    face = np.append(np.arange(n) // 3, -1)
+    m = np.arange(n)
+    table = np.ones((n + 1, n + 1, n), dtype=bool)
+    for second in range(n + 1):
+        for last in range(n + 1):
+            table[second, last] = ~(
+                (face[m] == face[last])
+                | (commute[last, :n] & (m < last))
+                | (commute[second, last] & (face[m] == face[second]))
+            )
+    return table
+
+CANONICAL_NEXT = _build_canonical_table()
+CANONICAL_NEXT_FACES = CANONICAL_NEXT & (np.arange(len(MOVE_NAMES)) < 18)
+for _table in (CANONICAL_NEXT, CANONICAL_NEXT_FACES):
+    _table.setflags(write=False)
+
+def canonical_mask(last=NO_MOVE, second_last=NO_MOVE, rotations=True):
+    """(27,) bool mask of the moves allowed after second_last, last
+    (move indices; NO_MOVE or -1 where there is no such move). Arrays of
+    indices give one mask row per entry.
+    """
+    table = CANONICAL_NEXT if rotations else CANONICAL_NEXT_FACES
+    last, second_last = np.asarray(last), np.asarray(second_last)
+    return table[np.where(second_last < 0, NO_MOVE, second_last), np.where(last < 0, NO_MOVE, last)]
@@ -0,0 +1,202 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from src.cube.constants import *
+from src.cube.cube import Cube
+from src.cube.coords import PieceCoord, CROSS_EDGES_BY_FACE, F2L_PAIRS_BY_FACE, _save_atomic, table_path
+
+# Pattern databases: exact distance-to-goal tables over the product of one or
+# more coordinates, built by breadth-first search one frontier at a time.
+# Tables (and the coordinate move tables they use) are saved as .npy files in
+# table_dir and memory-mapped on later loads, so only the first run pays for
+# generation.
+
+DEFAULT_TABLE_DIR = os.path.join(os.path.dirname(__file__), "tables")
+FACE_MOVES = tuple(range(18))      # U .. B2, no rotations
+UNSEEN = 255
+CHUNK = 1 << 20                    # states expanded per numpy pass
+PARALLEL_MIN_SIZE = 1 << 21        # smaller tables are built in-process
+
+def restricted_moves(faces="UDLRFB"):
+    """Face-move indices whose face is in faces, e.g. "UDLRF" for no B moves."""
+    return tuple(i for i in FACE_MOVES if MOVE_NAMES[i][0] in faces)
+
+
+class PatternDatabase:
+    def __init__(self, coords, moves=FACE_MOVES, name=None, table_dir=DEFAULT_TABLE_DIR, workers=None):
+        self.coords = list(coords)
+        self.moves = tuple(moves)
+        self.sizes = [c.size for c in self.coords]
+        self.size = int(np.prod(self.sizes, dtype=np.int64))
+        self.table_dir = table_dir
+        self.workers = workers or os.cpu_count() or 1
+        if name is None:
+            name = "__".join(c.name for c in self.coords)
+            if self.moves != FACE_MOVES:
+                name += "__m" + "-".join(map(str, self.moves))
+        self.name = name
+        self.path = table_path(table_dir, 'pdb', name)
+        self._table = None
+        self._move_tables = None
+
+    @classmethod
+    def for_pieces(cls, edges=(), corners=(), **kwargs):
+        """Distance table for the given edges and corners (positions and orientations)."""
+        coords = []
+        if edges:
+            coords.append(PieceCoord('edge', edges))
+        if corners:
+            coords.append(PieceCoord('corner', corners))
+        return cls(coords, **kwargs)
+
+    def __repr__(self):
+        return f"PatternDatabase({self.name!r}, size={self.size})"
+
+    # --------------------------------------------------------
+    # Indexing
+    # --------------------------------------------------------
+    def index(self, cube):
+        """Table index of a Cube (int) or of every row of a BatchCube (array)."""
+        idx = 0
+        for c, size in zip(self.coords, self.sizes):
+            idx = idx * size + c.encode(cube)
+        return idx
+
+    def split(self, idx):
+        """Table index -> per-coordinate values (inverse of index())."""
+        parts = []
+        for size in reversed(self.sizes):
+            idx, c = np.divmod(idx, size)
+            parts.append(c)
+        return parts[::-1]
+
+    def combine(self, parts):
+        idx = 0
+        for c, size in zip(parts, self.sizes):
+            idx = idx * size + c
+        return idx
+
+    @property
+    def move_tables(self):
+        if self._move_tables is None:
+            self._move_tables = [c.move_table(self.table_dir) for c in self.coords]
+        return self._move_tables
+
+    @property
+    def table(self) -> np.ndarray:
+        if self._table is None:
+            self.load()
+        return self._table
+
+    def distance(self, cube):
+        return self.table[self.index(cube)]
+
+    # --------------------------------------------------------
+    # Generation
+    # --------------------------------------------------------
+    def load(self):
+        if not os.path.exists(self.path):
+            self.build()
+        self._table = np.load(self.path, mmap_mode='r')
+        return self
+
+    def build(self):
+        """Breadth-first search from the solved state over self.moves."""
+        os.makedirs(self.table_dir, exist_ok=True)
+        table_paths = [table_path(self.table_dir, 'move', c.name) for c in self.coords]
+        for c, path in zip(self.coords, table_paths):
+            table = c.move_table(self.table_dir)
+            # A table first built without table_dir is cached on the coordinate
+            # but never saved, and the workers read the files
+            if not os.path.exists(path):
+                _save_atomic(path, np.asarray(table))
+
+        partial = f"{self.path}.{os.getpid()}.partial"
+        dist = np.lib.format.open_memmap(partial, mode='w+', dtype=np.uint8, shape=(self.size,))
+        dist[:] = UNSEEN
+        dist[self.index(Cube())] = 0
+        dist.flush()
+
+        workers = self.workers if self.size >= PARALLEL_MIN_SIZE else 1
+        # Ranges of at most CHUNK states keep each job's child arrays small
+        n_ranges = max(workers * 4, -(-self.size // CHUNK))
+        bounds = np.linspace(0, self.size, n_ranges + 1).astype(np.int64)
+        init_args = (partial, table_paths, self.sizes, self.moves)
+        pool = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=init_args) if workers > 1 else None
+        if pool is None:
+            _init_worker(*init_args, dist=dist)
+        try:
+            depth = 0
+            while True:
+                jobs = [(int(lo), int(hi), depth) for lo, hi in zip(bounds[:-1], bounds[1:])]
+                results = pool.map(_expand_range, jobs) if pool else map(_expand_range, jobs)
+                found = 0
+                for children in results:
+                    children = children[dist[children] == UNSEEN]
+                    dist[children] = depth + 1
+                    found += len(children)
+                dist.flush()
+                if found == 0:
+                    break
+                depth += 1
+        finally:
+            if pool:
+                pool.shutdown()
+        del dist
+        os.replace(partial, self.path)
+        return self
+
+
+# Worker state, set once per process by _init_worker
+_WORKER = {}
+
+def _init_worker(dist_path, table_paths, sizes, moves, dist=None):
+    _WORKER['dist'] = dist if dist is not None else np.load(dist_path, mmap_mode='r')
+    _WORKER['tables'] = [np.load(p, mmap_mode='r') for p in table_paths]
+    _WORKER['sizes'] = sizes
+    _WORKER['moves'] = moves
+
+def _expand_range(job):
+    """Unseen neighbours of the depth-d states with index in [lo, hi)."""
+    lo, hi, depth = job
+    dist, tables, sizes, moves = _WORKER['dist'], _WORKER['tables'], _WORKER['sizes'], _WORKER['moves']
+    frontier = lo + np.flatnonzero(dist[lo:hi] == depth)
+    found = []
+    for start in range(0, len(frontier), CHUNK):
+        idx = frontier[start:start + CHUNK]
+        parts = []
+        for size in reversed(sizes):
+            idx, c = np.divmod(idx, size)
+            parts.append(c)
+        parts = parts[::-1]
+        for m in moves:
+            child = np.zeros(len(parts[0]), dtype=np.int64)
+            for table, c, size in zip(tables, parts, sizes):
+                child = child * size + table[c, m]
+            found.append(child[dist[child] == UNSEEN])
+    if not found:
+        return np.empty(0, dtype=np.int64)
+    return np.unique(np.concatenate(found))
+
+
+# --------------------------------------------------------
+# Common tables
+# --------------------------------------------------------
+def cross_pdb(face='D', faces="UDLRFB", **kwargs):
+    """Exact cross distances (190,080 states) for the cross on face, using moves of faces."""
+    return PatternDatabase.for_pieces(edges=CROSS_EDGES_BY_FACE[face], moves=restricted_moves(faces), **kwargs)
+
+def pair_pdb(slot, face='D', faces="UDLRFB", **kwargs):
+    """Distances for a single F2L pair (edge + corner, 576 states)."""
+    edge, corner = F2L_PAIRS_BY_FACE[face][slot]
+    return PatternDatabase.for_pieces(edges=(edge,), corners=(corner,), moves=restricted_moves(faces), **kwargs)
+
+def cross_pair_pdb(slot, face='D', faces="UDLRFB", **kwargs):
+    """Distances for the cross plus one F2L pair (190,080 * 24 * 24 states)."""
+    # Product of three small coordinates rather than one 5-edge coordinate,
+    # so the move tables stay a few MB; states where the pair edge overlaps a
+    # cross edge are unreachable and stay UNSEEN.
+    edge, corner = F2L_PAIRS_BY_FACE[face][slot]
+    coords = [PieceCoord('edge', CROSS_EDGES_BY_FACE[face]), PieceCoord('edge', (edge,)),
+              PieceCoord('corner', (corner,))]
+    return PatternDatabase(coords, moves=restricted_moves(faces), **kwargs)
@@ -0,0 +1,128 @@
+import numpy as np
+from src.cube.constants import *
+import src.cube.moves as moves
+
+# The 48 cube symmetries: 24 whole-cube rotations, each optionally followed
+# by the left-right mirror. Symmetry k maps a state c to
+#     conj_k(c) = mirror?(r^-1 * c * r)      (r = ROTATIONS[k % 24], mirror if k >= 24)
+# where r is the transform the simulator applies for that rotation (built
+# from the x/y/z definitions in moves.py). Each conj_k is an automorphism of
+# the state group, so conj_k(a * b) = conj_k(a) * conj_k(b).
+
+# Which face ends up on top ("", x, x2, x', z, z') times the four y turns
+ROTATIONS = [
+    (top + " " + turn).strip()
+    for top in ("", "x", "x2", "x'", "z", "z'")
+    for turn in ("", "y", "y2", "y'")
+]
+N_SYMS = 2 * len(ROTATIONS)
+
+# Left-right mirror: slot i <-> MIRROR_*[i], corner twists change direction
+MIRROR_CP = np.array([UFL, URF, UBR, ULB, DLF, DFR, DRB, DBL])
+MIRROR_EP = np.array([UL, UF, UR, UB, DL, DF, DR, DB, FL, FR, BR, BL])
+
+def _mirror(cp, co, ep, eo):
+    """Mirror (..., 8) / (..., 12) state arrays through the L-R plane."""
+    return (
+        MIRROR_CP[cp[..., MIRROR_CP]],
+        (-co[..., MIRROR_CP]) % 3,
+        MIRROR_EP[ep[..., MIRROR_EP]],
+        eo[..., MIRROR_EP],
+    )
+
+def _build_tables():
+    rots = [moves.compile_moves(r) for r in ROTATIONS]
+    invs = [moves.invert(t) for t in rots]
+    stack = lambda ts, i: np.array([t[i] for t in ts] * 2)
+    return (stack(rots, 0), stack(rots, 1), stack(rots, 2), stack(rots, 3),
+            stack(invs, 0), stack(invs, 1), stack(invs, 2), stack(invs, 3))
+
+(SYM_CP, SYM_CO, SYM_EP, SYM_EO,
+ SYM_INV_CP, SYM_INV_CO, SYM_INV_EP, SYM_INV_EO) = _build_tables()
+SYM_MIRRORED = np.arange(N_SYMS) >= len(ROTATIONS)
+
+
+def conjugate_all(cp, co, ep, eo):
+    """All 48 symmetric versions of one state: four (48, 8) / (48, 12) arrays."""
+    cp, ep = np.asarray(cp, dtype=np.intp), np.asarray(ep, dtype=np.intp)
+    # left = r^-1 * c
+    l_cp = SYM_INV_CP[:, cp]
+    l_co = (SYM_INV_CO[:, cp] + co) % 3
+    l_ep = SYM_INV_EP[:, ep]
+    l_eo = (SYM_INV_EO[:, ep] + eo) % 2
+    # left * r
+    r_cp = np.take_along_axis(l_cp, SYM_CP, axis=1)
+    r_co = (np.take_along_axis(l_co, SYM_CP, axis=1) + SYM_CO) % 3
+    r_ep = np.take_along_axis(l_ep, SYM_EP, axis=1)
+    r_eo = (np.take_along_axis(l_eo, SYM_EP, axis=1) + SYM_EO) % 2
+    m = SYM_MIRRORED
+    r_cp[m], r_co[m], r_ep[m], r_eo[m] = _mirror(r_cp[m], r_co[m], r_ep[m], r_eo[m])
+    return r_cp, r_co, r_ep, r_eo
+
+def conjugate_rows(cp, co, ep, eo, k: int):
+    """conj_k of every row of (N, 8) / (N, 12) state arrays (e.g. a BatchCube's)."""
+    cp, ep = np.asarray(cp, dtype=np.intp), np.asarray(ep, dtype=np.intp)
+    l_cp, l_co = SYM_INV_CP[k][cp], (SYM_INV_CO[k][cp] + co) % 3
+    l_ep, l_eo = SYM_INV_EP[k][ep], (SYM_INV_EO[k][ep] + eo) % 2
+    rows = (l_cp[:, SYM_CP[k]], (l_co[:, SYM_CP[k]] + SYM_CO[k]) % 3,
+            l_ep[:, SYM_EP[k]], (l_eo[:, SYM_EP[k]] + SYM_EO[k]) % 2)
+    return _mirror(*rows) if SYM_MIRRORED[k] else rows
+
+def apply_symmetry(cube, k: int):
+    """conj_k(cube) as a new cube of the same type."""
+    cp, co, ep, eo = (a[k] for a in conjugate_all(cube.corners_pos, cube.corners_ori,
+                                                   cube.edges_pos, cube.edges_ori))
+    return type(cube).from_transform((cp, co, ep, eo))
+
+def _packed(cp, co, ep, eo):
+    # Same byte layout as Cube.state_key()
+    return np.concatenate([cp | (co << 3), ep | (eo << 4)], axis=-1).astype(np.uint8)
+
+def canonical_key(cube):
+    """(20-byte key of the minimal symmetric representative, symmetry index).
+    Every symmetry preserves the distance to solved (see SYM_MOVE), so the
+    key can index distance caches and pruning tables.
+    """
+    packed = _packed(*conjugate_all(cube.corners_pos, cube.corners_ori, cube.edges_pos, cube.edges_ori))
+    k = int(np.lexsort(packed.T[::-1])[0])
+    return packed[k].tobytes(), k
+
+def canonicalize(cube):
+    """Return (representative, k): the symmetric version of cube with the
+    smallest state key, and the symmetry k with apply_symmetry(cube, k) == representative.
+    """
+    _, k = canonical_key(cube)
+    return apply_symmetry(cube, k), k
+
+
+def _build_sym_inverse():
+    inv = np.empty(N_SYMS, dtype=np.int64)
+    ref = moves.compile_moves("R U F' L2 D B x")
+    ref_packed = _packed(*ref)
+    images = conjugate_all(*ref)
+    for k in range(N_SYMS):
+        back = _packed(*conjugate_all(*(a[k] for a in images)))
+        inv[k] = np.flatnonzero((back == ref_packed).all(axis=1))[0]
+    return inv
+
+def _build_sym_move():
+    n_moves = len(MOVE_NAMES)
+    keys = {_packed(moves.MOVE_CP[m], moves.MOVE_CO[m], moves.MOVE_EP[m], moves.MOVE_EO[m]).tobytes(): m
+            for m in range(n_moves)}
+    table = np.full((N_SYMS, n_moves), -1, dtype=np.int64)
+    for m in range(n_moves):
+        images = _packed(*conjugate_all(moves.MOVE_CP[m], moves.MOVE_CO[m], moves.MOVE_EP[m], moves.MOVE_EO[m]))
+        for k in range(N_SYMS):
+            table[k, m] = keys.get(images[k].tobytes(), -1)
+    return table
+
+# SYM_INV[k]: the symmetry undoing k.
+SYM_INV = _build_sym_inverse()
+
+# SYM_MOVE[k, m]: the move m' with conj_k(m) == m', or -1 when conj_k(m) is
+# not a single move. Where a row is complete over a move set, conj_k maps
+# solutions to solutions (move m in c's solution becomes SYM_MOVE[k, m]) and
+# distances are preserved. With the Kociemba twist/flip conventions of
+# moves.py every row is complete, so FACE_MOVE_SYMS holds all 48.
+SYM_MOVE = _build_sym_move()
+FACE_MOVE_SYMS = np.flatnonzero((SYM_MOVE[:, :18] >= 0).all(axis=1))
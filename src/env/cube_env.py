@@ -3,16 +3,19 @@ from gymnasium import spaces
 import numpy as np
 import random
 from typing import Tuple, Dict
-from src.cube.cube import Cube
+from src.cube.cube import CompactCube
 from src.cube.constants import MOVE_NAMES
+from src.cube.moves import NO_MOVE, canonical_mask
 from src.cube.goals.manager import GoalManager
 
 class CubeEnv(gym.Env):
-    def __init__(self, scramble_len: int = 10, max_steps: int = 200, goal: str = "solve"):
+    def __init__(self, scramble_len: int = 10, max_steps: int = 200, goal: str = "solve",
+                 allow_rotations: bool = True):
         super(CubeEnv, self).__init__()
         self.scramble_len = scramble_len
         self.max_steps = max_steps
         self.goal = goal
+        self.allow_rotations = allow_rotations
         
         # State: 20 pieces * 5 features = 100
         self.observation_space = spaces.Box(low=0, high=1, shape=(100,), dtype=np.float32)
@@ -22,10 +25,12 @@ class CubeEnv(gym.Env):
         # Actions: 27 moves (U..B2, x..z2)
         self.action_space = spaces.Discrete(len(MOVE_NAMES))
         
-        self.cube = Cube()
+        # History stays off: reset() stores the scramble, steps are not recorded.
+        self.cube = CompactCube()
         self.steps = 0
         self.rotation_count = 0
         self.last_move = ""
+        self.last_moves = (NO_MOVE, NO_MOVE)   # (second to last, last) move index
 
     def reset(self, scramble_len=None, goal=None) -> Tuple[np.ndarray, Dict]:
         if goal: self.goal = goal
@@ -33,6 +38,7 @@ class CubeEnv(gym.Env):
         self.steps = 0
         self.rotation_count = 0
         self.last_move = ""
+        self.last_moves = (NO_MOVE, NO_MOVE)
         
         slen = scramble_len if scramble_len is not None else self.scramble_len
 
@@ -74,9 +80,10 @@ class CubeEnv(gym.Env):
         self.goal_archetype = goal_map.get(self.goal)
         self.prev_similarity = self.goal_manager.score_state(self.cube, self.goal_archetype) if self.goal_archetype else 0.0
 
-        self.prev_cross = self.cube.cross_count()
-        self.prev_f2l = self.cube.f2l_slots_solved()
-        self.prev_eo = self.cube.eo_solved()
+        progress = self.cube.progress()
+        self.prev_cross = progress.cross
+        self.prev_f2l = progress.f2l
+        self.prev_eo = progress.eo
 
         return self._get_obs(), {}
 
@@ -102,14 +109,10 @@ class CubeEnv(gym.Env):
         return obs.flatten() # Flatten for now, model will reshape if needed
 
     def get_action_mask(self) -> np.ndarray:
-        """Returns a mask of valid moves (prevents repeating same face)"""
-        mask = np.ones(len(MOVE_NAMES), dtype=bool)
-        if self.last_move:
-            last_face = self.last_move[0].upper()
-            for i, name in enumerate(MOVE_NAMES):
-                if name[0].upper() == last_face:
-                    mask[i] = False
-        return mask
+        """Returns a mask of valid moves: canonical sequences only (no repeated
+        face, commuting moves in a fixed order, see moves.CANONICAL_NEXT)"""
+        second_last, last = self.last_moves
+        return canonical_mask(last, second_last, self.allow_rotations)
 
     def step(self, action_idx: int) -> Tuple[np.ndarray, float, bool, bool, Dict]:
         action = MOVE_NAMES[action_idx]
@@ -121,10 +124,7 @@ class CubeEnv(gym.Env):
         self.cube.apply_move(action)
 
         # Progress rewards
-        cross = self.cube.cross_count()
-        f2l = self.cube.f2l_slots_solved()
-        eo = self.cube.eo_solved()
-        solved = self.cube.is_solved()
+        cross, f2l, eo, solved = self.cube.progress()
 
         # Pattern-based Reward (from Goal Archetypes)
         if self.goal_archetype:
@@ -161,5 +161,6 @@ class CubeEnv(gym.Env):
         self.prev_f2l = f2l
         self.prev_eo = eo
         self.last_move = action
+        self.last_moves = (self.last_moves[1], int(action_idx))
 
         return self._get_obs(), reward, terminated, truncated, {}
@@ -0,0 +1,42 @@
+from src.cube.cube import Cube
+from src.cube.constants import MOVE_NAMES
+from src.cube.moves import NO_MOVE, canonical_mask
+
+MOVE_IDX = {name: i for i, name in enumerate(MOVE_NAMES)}
+
+def _reached(moves, depth, canonical, rotations=False):
+    """state keys reachable in at most depth moves, with or without pruning."""
+    seen = {Cube().state_key()}
+    frontier = [(Cube(), NO_MOVE, NO_MOVE)]
+    for _ in range(depth):
+        nxt = []
+        for cube, second_last, last in frontier:
+            allowed = canonical_mask(last, second_last, rotations) if canonical else None
+            for m in moves:
+                if canonical and not allowed[m]:
+                    continue
+                child = cube.copy()
+                child.apply_move_idx(m)
+                seen.add(child.state_key())
+                nxt.append((child, last, m))
+        frontier = nxt
+    return seen
+
+def test_canonical_sequences_reach_every_state():
+    face_moves = range(18)
+    for depth in range(1, 4):
+        assert _reached(face_moves, depth, True) == _reached(face_moves, depth, False), depth
+
+def test_canonical_sequences_with_rotations_reach_every_state():
+    all_moves = range(len(MOVE_NAMES))
+    for depth in range(1, 3):
+        assert _reached(all_moves, depth, True, True) == _reached(all_moves, depth, False), depth
+
+def test_pruning_rules():
+    allowed = lambda seq: canonical_mask(*[MOVE_IDX[m] for m in reversed(seq.split())][:2])
+    assert not allowed("U")[MOVE_IDX["U2"]]           # same face
+    assert allowed("U")[MOVE_IDX["D"]]                # commuting, in order
+    assert not allowed("D")[MOVE_IDX["U"]]            # commuting, out of order
+    assert not allowed("U D")[MOVE_IDX["U'"]]         # U D U
+    assert allowed("R")[MOVE_IDX["x"]] and not allowed("x")[MOVE_IDX["R"]]   # R commutes with x
+    assert not canonical_mask(rotations=False)[18:].any()
@@ -0,0 +1,59 @@
+import random
+import pytest
+from src.cube.cube import Cube
+from src.cube.constants import MOVE_NAMES
+from src.cube.coords import CROSS_EDGES_BY_FACE, F2L_PAIRS_BY_FACE
+from src.agent.search import CrossSolver, F2LSolver
+
+FACE_MOVE_NAMES = MOVE_NAMES[:18]
+
+def _scramble(rng, length):
+    return " ".join(rng.choice(FACE_MOVE_NAMES) for _ in range(length))
+
+def _edges_solved(cube, edges):
+    return all(cube.edges_pos[e] == e and cube.edges_ori[e] == 0 for e in edges)
+
+def _pair_solved(cube, slot):
+    edge, corner = F2L_PAIRS_BY_FACE['D'][slot]
+    return _edges_solved(cube, (edge,)) and cube.corners_pos[corner] == corner and cube.corners_ori[corner] == 0
+
+@pytest.fixture(scope="module")
+def cross_solver():
+    return CrossSolver('D')
+
+def test_cross_solutions_solve_scrambles(cross_solver):
+    rng = random.Random(0)
+    for _ in range(20):
+        scramble = _scramble(rng, 25)
+        cube = Cube()
+        cube.apply_sequence(scramble)
+        distance = cross_solver.pdb.distance(cube)
+        solutions = cross_solver.solve(cube, max_solutions=5)
+        assert solutions, scramble
+        for sol in solutions:
+            assert len(sol) == distance
+            solved = cube.copy()
+            solved.apply_sequence(" ".join(sol))
+            assert _edges_solved(solved, CROSS_EDGES_BY_FACE['D']), (scramble, sol)
+
+def test_cross_solutions_are_no_longer_than_short_scrambles(cross_solver):
+    rng = random.Random(1)
+    for length in range(1, 6):
+        scramble = _scramble(rng, length)
+        cube = Cube()
+        cube.apply_sequence(scramble)
+        assert len(cross_solver.solve(cube, max_solutions=1)[0]) <= length, scramble
+
+def test_xcross_solutions_solve_scrambles():
+    # Builds the cross + FR pair table in the default table directory on first run
+    solver = F2LSolver('D')
+    rng = random.Random(2)
+    for _ in range(3):
+        scramble = _scramble(rng, 25)
+        cube = Cube()
+        cube.apply_sequence(scramble)
+        sol = solver.solve(cube, fr=True)[0]
+        solved = cube.copy()
+        solved.apply_sequence(" ".join(sol))
+        assert _edges_solved(solved, CROSS_EDGES_BY_FACE['D']), (scramble, sol)
+        assert _pair_solved(solved, "FR"), (scramble, sol)
@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+import torch
+from src.agent.model import ActorCritic
+from src.agent.inference_cache import InferenceCache, CACHE_SYMS
+from src.agent.search import spatial_obs
+from src.cube.batch import BatchCube
+from src.cube.cube import Cube
+from src.cube.symmetry import SYM_MOVE, apply_symmetry
+
+SCRAMBLES = ["R", "U F'", "L2 D B", "R U R' U'", "F2 L' D2 B R"]
+
+class CountingModel(torch.nn.Module):
+    """ActorCritic that records how many rows each forward pass gets."""
+    def __init__(self):
+        super().__init__()
+        self.net = ActorCritic(100, 27).eval()
+        self.rows = []
+
+    def forward(self, x):
+        self.rows.append(len(x))
+        return self.net(x)
+
+@pytest.fixture
+def model():
+    torch.manual_seed(0)
+    return CountingModel()
+
+def _batch(scrambles):
+    cubes = []
+    for seq in scrambles:
+        cube = Cube()
+        cube.apply_sequence(seq)
+        cubes.append(cube)
+    return BatchCube.from_cubes(cubes)
+
+def _direct(model, batch):
+    with torch.no_grad():
+        logits, values = model.net(torch.from_numpy(spatial_obs(batch)))
+    return logits.numpy(), values.numpy()[:, 0]
+
+def test_outputs_and_counters(model):
+    cache = InferenceCache(model, spatial_obs)
+    batch = _batch(SCRAMBLES)
+    logits, values = cache.evaluate(batch)
+    ref_logits, ref_values = _direct(model, batch)
+    np.testing.assert_allclose(logits, ref_logits, atol=1e-5)
+    np.testing.assert_allclose(values, ref_values, atol=1e-5)
+    assert cache.stats() == {'size': 5, 'capacity': cache.capacity, 'hits': 0, 'misses': 5, 'hit_rate': 0.0}
+
+    again, _ = cache.evaluate(_batch(SCRAMBLES[:2] + ["B"]))
+    assert (cache.hits, cache.misses) == (2, 6)
+    assert model.rows == [5, 1]
+    np.testing.assert_array_equal(again[:2], logits[:2])
+
+def test_repeated_misses_run_once(model):
+    cache = InferenceCache(model, spatial_obs)
+    logits, _ = cache.evaluate(_batch(["R", "U", "R", "R", "U"]))
+    assert model.rows == [2]
+    np.testing.assert_array_equal(logits[0], logits[2])
+    assert len(cache) == 2
+
+def test_lru_eviction(model):
+    cache = InferenceCache(model, spatial_obs, capacity=3)
+    cache.evaluate(_batch(SCRAMBLES[:3]))
+    cache.evaluate(_batch(SCRAMBLES[:1]))        # refresh the first entry
+    cache.evaluate(_batch(SCRAMBLES[3:4]))       # evicts the least recently used: the second
+    assert len(cache) == 3
+    model.rows.clear()
+    cache.evaluate(_batch([SCRAMBLES[0], SCRAMBLES[2], SCRAMBLES[3]]))
+    assert model.rows == []
+    cache.evaluate(_batch(SCRAMBLES[1:2]))
+    assert model.rows == [1]
+
+def test_invalidated_by_optimizer_step(model):
+    cache = InferenceCache(model, spatial_obs)
+    batch = _batch(SCRAMBLES)
+    before, _ = cache.evaluate(batch)
+    optimizer = torch.optim.SGD(model.parameters(), lr=0.1)
+    _, values = model(torch.from_numpy(spatial_obs(batch)))
+    values.sum().backward()
+    optimizer.step()
+    after, _ = cache.evaluate(batch)
+    assert len(cache) == 5 and cache.hits == 0
+    assert np.abs(after - before).max() > 0
+    np.testing.assert_allclose(after, _direct(model, batch)[0], atol=1e-5)
+
+def test_invalidated_by_load_state_dict(model):
+    cache = InferenceCache(model, spatial_obs)
+    batch = _batch(SCRAMBLES)
+    cache.evaluate(batch)
+    torch.manual_seed(1)
+    model.net.load_state_dict(ActorCritic(100, 27).state_dict())
+    logits, _ = cache.evaluate(batch)
+    assert cache.hits == 0
+    np.testing.assert_allclose(logits, _direct(model, batch)[0], atol=1e-5)
+
+def test_symmetric_states_share_an_entry(model):
+    cache = InferenceCache(model, spatial_obs, symmetry=True)
+    cube = _batch(["R U F' L2 D"]).to_cube(0)
+    base_logits, base_values = cache.evaluate(BatchCube.from_cubes([cube]))
+    images = BatchCube.from_cubes([apply_symmetry(cube, k) for k in CACHE_SYMS])
+    logits, values = cache.evaluate(images)
+    assert model.rows == [1]
+    assert cache.hits == len(CACHE_SYMS)
+    np.testing.assert_array_equal(values, np.repeat(base_values, len(CACHE_SYMS)))
+    for row, k in zip(logits, CACHE_SYMS):
+        # Move m on the image is move SYM_MOVE[k, m] on the original
+        np.testing.assert_array_equal(row[SYM_MOVE[k]], base_logits[0])
@@ -0,0 +1,40 @@
+import pytest
+from src.cube.cube import Cube
+from src.cube.constants import MOVE_NAMES
+from src.cube.moves import IDENTITY, compile_moves, parse_moves
+
+WIDE_AND_SLICE = ["r", "l", "u", "d", "f", "b", "M"]
+
+def _solved_after(seq):
+    cube = Cube()
+    cube.apply_sequence(seq)
+    return cube.is_solved()
+
+def _is_identity(t):
+    return all((a == b).all() for a, b in zip(t, IDENTITY))
+
+@pytest.mark.parametrize("move", list(MOVE_NAMES[::3]) + WIDE_AND_SLICE)
+def test_move_then_inverse_is_identity(move):
+    assert _solved_after(f"{move} {move}'")
+    assert _solved_after(f"{move}' {move}")
+    assert _solved_after(f"{move}2 {move}2")
+    assert _is_identity(compile_moves(f"{move} {move}'"))
+
+@pytest.mark.parametrize("move", WIDE_AND_SLICE)
+def test_wide_moves_have_order_four(move):
+    assert not _solved_after(move)
+    assert _solved_after(" ".join([move] * 4))
+    twice, double = compile_moves(f"{move} {move}"), compile_moves(f"{move}2")
+    assert all((a == b).all() for a, b in zip(twice, double))
+
+def test_wide_move_is_face_turn_plus_slice():
+    # r = R M', so r R' is a slice turn and leaves every corner in place
+    for wide, face in [("r", "R"), ("l", "L"), ("u", "U"), ("d", "D"), ("f", "F"), ("b", "B")]:
+        cube = Cube()
+        cube.apply_sequence(f"{wide} {face}'")
+        assert cube.corners_pos.tolist() == list(range(8)), wide
+        assert cube.corners_ori.tolist() == [0] * 8, wide
+
+def test_parse_moves_ignores_comments_and_groups():
+    assert parse_moves("R U (x y) R' // trigger") == ["R", "U", "R'"]
+    assert parse_moves("R’ U2") == ["R'", "U2"]
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+import torch
+from src.agent.model import ActorCritic
+from src.agent.numpy_model import NumpyActorCritic, run_model
+from src.agent.export import export_npz, load_model
+
+OBS_DIM, ACT_DIM = 100, 27
+
+@pytest.fixture(scope="module")
+def models():
+    torch.manual_seed(0)
+    model = ActorCritic(OBS_DIM, ACT_DIM).eval()
+    with torch.no_grad():
+        # Random LayerNorm scales and biases too, not just the Linear layers
+        for p in model.parameters():
+            p.add_(torch.randn_like(p) * 0.1)
+    state = {name: w.numpy() for name, w in model.state_dict().items()}
+    return model, NumpyActorCritic(state)
+
+@pytest.mark.parametrize("n", [1, 64])
+def test_outputs_match_torch(models, n):
+    model, numpy_model = models
+    obs = np.random.default_rng(n).random((n, OBS_DIM), dtype=np.float32)
+    with torch.no_grad():
+        ref_logits, ref_values = model(torch.from_numpy(obs))
+    logits, values = numpy_model(obs)
+    assert logits.shape == (n, ACT_DIM) and values.shape == (n, 1)
+    assert logits.dtype == np.float32 and values.dtype == np.float32
+    np.testing.assert_allclose(logits, ref_logits.numpy(), atol=1e-4)
+    np.testing.assert_allclose(values, ref_values.numpy(), atol=1e-4)
+
+def test_single_observation(models):
+    _, numpy_model = models
+    obs = np.random.default_rng(0).random(OBS_DIM, dtype=np.float32)
+    logits, values = numpy_model(obs)
+    np.testing.assert_array_equal(logits, numpy_model(obs[None])[0])
+
+def test_run_model_agrees_for_both_backends(models):
+    model, numpy_model = models
+    obs = np.random.default_rng(1).random((8, OBS_DIM), dtype=np.float32)
+    torch_logits, torch_values = run_model(model, obs)
+    logits, values = run_model(numpy_model, obs)
+    assert values.shape == torch_values.shape == (8,)
+    np.testing.assert_allclose(logits, torch_logits, atol=1e-4)
+    np.testing.assert_allclose(values, torch_values, atol=1e-4)
+
+def test_npz_round_trip(models, tmp_path):
+    model, numpy_model = models
+    path = str(tmp_path / "model.npz")
+    export_npz(model, path)
+    loaded = load_model(path)
+    assert isinstance(loaded, NumpyActorCritic)
+    assert (loaded.obs_dim, loaded.action_dim, len(loaded.blocks)) == (OBS_DIM, ACT_DIM, 6)
+    obs = np.random.default_rng(2).random((4, OBS_DIM), dtype=np.float32)
+    np.testing.assert_array_equal(loaded(obs)[0], numpy_model(obs)[0])
@@ -0,0 +1,69 @@
+import numpy as np
+from src.cube.cube import Cube
+from src.cube import pdb
+from src.cube.constants import FR, DFR
+from src.cube.coords import PieceCoord
+from src.cube.pdb import FACE_MOVES, UNSEEN, PatternDatabase, cross_pdb, pair_pdb, restricted_moves
+
+def _bfs_distances(table, moves, max_depth=None):
+    """table index -> distance, by BFS over Cubes with one representative
+    cube per index (the index only depends on the pieces it tracks)."""
+    start = Cube()
+    dist = {int(table.index(start)): 0}
+    frontier = [start]
+    depth = 0
+    while frontier and (max_depth is None or depth < max_depth):
+        depth += 1
+        nxt = []
+        for cube in frontier:
+            for m in moves:
+                child = cube.copy()
+                child.apply_move_idx(m)
+                idx = int(table.index(child))
+                if idx not in dist:
+                    dist[idx] = depth
+                    nxt.append(child)
+        frontier = nxt
+    return dist
+
+def _check(table, dist, complete):
+    values = np.asarray(table.table)
+    for idx, d in dist.items():
+        assert values[idx] == d, idx
+    if complete:
+        assert (values != UNSEEN).sum() == len(dist)
+    else:
+        rest = np.ones(table.size, dtype=bool)
+        rest[list(dist)] = False
+        assert (values[rest] > max(dist.values())).all()
+
+def test_pair_pdb_matches_bfs(tmp_path):
+    table = pair_pdb("FR", table_dir=str(tmp_path)).load()
+    _check(table, _bfs_distances(table, FACE_MOVES), complete=True)
+
+def test_restricted_pair_pdb_matches_bfs(tmp_path):
+    moves = restricted_moves("UDRF")
+    table = pair_pdb("FR", faces="UDRF", table_dir=str(tmp_path)).load()
+    _check(table, _bfs_distances(table, moves), complete=True)
+
+def test_cross_pdb_matches_bfs(tmp_path):
+    table = cross_pdb("D", table_dir=str(tmp_path)).load()
+    values = np.asarray(table.table)
+    assert (values != UNSEEN).all()
+    assert values.max() == 8
+    _check(table, _bfs_distances(table, FACE_MOVES, max_depth=4), complete=False)
+
+def test_build_saves_cached_move_tables(tmp_path):
+    # A coordinate whose move table was built without table_dir has it cached
+    # in memory only; the BFS reads the move tables from disk
+    edge, corner = PieceCoord('edge', (FR,)), PieceCoord('corner', (DFR,))
+    for c in (edge, corner):
+        c.move_table()
+    table = PatternDatabase([edge, corner], table_dir=str(tmp_path)).load()
+    assert np.array_equal(table.table, pair_pdb("FR", table_dir=str(tmp_path / "fresh")).table)
+
+def test_parallel_build_matches_in_process(tmp_path, monkeypatch):
+    serial = pair_pdb("BL", table_dir=str(tmp_path / "serial")).load()
+    monkeypatch.setattr(pdb, "PARALLEL_MIN_SIZE", 1)
+    parallel = pair_pdb("BL", table_dir=str(tmp_path / "parallel"), workers=2).load()
+    assert np.array_equal(serial.table, parallel.table)
@@ -0,0 +1,123 @@
+import pytest
+import torch
+from src.cube.cube import Cube
+from src.cube.batch import BatchCube
+from src.cube.goals.manager import GoalManager
+from src.agent.search import BeamSearchSolver, MCTSSolver, WeightedAStarSolver, goal_predicate, solve_stages
+
+SHORT_SCRAMBLES = ["R U", "F' L2", "R U F'", "D B' R2"]
+LONG_SCRAMBLE = "R U F' L2 D B R' U2 F D' L B2 R U' F2 D"
+
+class Oracle(torch.nn.Module):
+    """Uniform policy, and a third of the unsolved pieces as the predicted
+    moves left: good enough for short scrambles. Takes spatial_obs
+    observations (is_solved is the 5th feature of each slot)."""
+    def forward(self, x):
+        x = x.view(len(x), 20, 5)
+        return torch.zeros(len(x), 27), (1 - x[:, :, 4]).sum(1, keepdim=True) / 3
+
+def _scrambled(seq):
+    cube = Cube()
+    cube.apply_sequence(seq)
+    return cube
+
+def _solves(cube, solution):
+    cube = cube.copy()
+    cube.apply_sequence(solution)
+    return cube.is_solved()
+
+@pytest.mark.parametrize("scramble", SHORT_SCRAMBLES)
+def test_astar_solves_short_scrambles(scramble):
+    cube = _scrambled(scramble)
+    result = WeightedAStarSolver(Oracle(), batch_size=20).search(cube)
+    assert result.solution is not None and not result.timed_out
+    assert _solves(cube, result.solution)
+    assert len(result.solution) <= len(scramble.split())
+
+def test_astar_solved_start():
+    assert WeightedAStarSolver(Oracle()).solve(Cube()) == []
+
+@pytest.mark.parametrize("workers", [1, 4])
+@pytest.mark.parametrize("scramble", SHORT_SCRAMBLES[:3])
+def test_mcts_solves_short_scrambles(scramble, workers):
+    cube = _scrambled(scramble)
+    solver = MCTSSolver(Oracle(), simulations=5000, batch_size=8, workers=workers)
+    result = solver.search(cube)
+    assert result.solution is not None and not result.timed_out
+    assert _solves(cube, result.solution)
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_mcts_backs_up_every_descent(workers):
+    # A search that runs out of simulations has evaluated every leaf it
+    # selected, so no virtual loss is left and visits add up
+    solver = MCTSSolver(Oracle(), simulations=300, batch_size=8, workers=workers)
+    result = solver.search(_scrambled(LONG_SCRAMBLE))
+    tree, n = solver._tree, len(solver._tree)
+    assert result.solution is None and not result.timed_out
+    assert (tree.virtual[:n] == 0).all()
+    assert tree.visits[solver._root].sum() == solver._done
+
+SOLVERS = {
+    'beam': lambda: BeamSearchSolver(Oracle(), beam_width=50, max_depth=1000),
+    'astar': lambda: WeightedAStarSolver(Oracle(), batch_size=20),
+    'mcts': lambda: MCTSSolver(Oracle(), simulations=100_000, batch_size=8),
+}
+
+@pytest.mark.parametrize("name", SOLVERS)
+def test_tiny_budget_returns_best_partial(name):
+    cube = _scrambled(LONG_SCRAMBLE)
+    reports = []
+    result = SOLVERS[name]().search(cube, time_budget=0.05, on_progress=reports.append)
+    assert result.timed_out and result.solution is None
+    assert result.best_path is not None and reports
+    # stage is the progress of the state best_path leads to
+    best = cube.copy()
+    best.apply_sequence(result.best_path)
+    assert tuple(best.progress()) == tuple(result.stage)
+    assert result.elapsed < 5
+
+@pytest.mark.parametrize("name", SOLVERS)
+def test_budget_does_not_stop_a_quick_solve(name):
+    cube = _scrambled("R U")
+    result = SOLVERS[name]().search(cube, time_budget=30)
+    assert not result.timed_out and _solves(cube, result.solution)
+    assert result.best_path == result.solution
+
+def test_goal_predicate(tmp_path, monkeypatch):
+    batch = BatchCube.from_cubes([Cube(), _scrambled("R U")])
+    assert goal_predicate()(batch).tolist() == [True, False]
+    custom = lambda b: b.cross_count() >= 2
+    assert goal_predicate(custom) is custom
+    with pytest.raises(ValueError):
+        goal_predicate("No Such Goal")
+    # Goal files are found from any working directory
+    monkeypatch.chdir(tmp_path)
+    assert goal_predicate("White Cross")(batch).tolist() == [True, False]
+
+@pytest.mark.parametrize("name", SOLVERS)
+def test_search_stops_at_goal(name):
+    cube = _scrambled("R U F' L2 D")
+    result = SOLVERS[name]().search(cube, goal="White Edge UF")
+    assert result.solution is not None
+    done = cube.copy()
+    done.apply_sequence(result.solution)
+    assert GoalManager().reached(done, "White Edge UF")
+
+def test_solve_stages_keeps_earlier_goals():
+    goals = ["White Edge UF", "White Cross", "White F2L Pair 1 (FR)"]
+    cube = _scrambled("R U F' L2 D B R2")
+    staged = solve_stages(WeightedAStarSolver(Oracle(), batch_size=20), cube, goals)
+    assert staged.solution == sum((stage.solution for stage in staged.stages), [])
+    assert len(staged.stages) == len(goals)
+    done = cube.copy()
+    done.apply_sequence(staged.solution)
+    manager = GoalManager()
+    assert all(manager.reached(done, goal) for goal in goals)
+
+def test_solve_stages_stops_at_failed_stage():
+    cube = _scrambled("R U F' L2 D B R2")
+    staged = solve_stages(WeightedAStarSolver(Oracle(), max_nodes=50), cube,
+                          ["White Edge UF", "White Cross", "White F2L Pair 1 (FR)"])
+    assert staged.solution is None
+    assert staged.stages[-1].solution is None
+    assert all(stage.solution is not None for stage in staged.stages[:-1])
@@ -0,0 +1,69 @@
+import numpy as np
+from src.cube.cube import Cube
+from src.cube.constants import MOVE_NAMES
+from src.cube.symmetry import SYM_MOVE, N_SYMS, apply_symmetry, canonical_key
+from src.cube.pdb import FACE_MOVES
+
+def _order(seq):
+    c = Cube()
+    n = 0
+    while True:
+        c.apply_sequence(seq)
+        n += 1
+        if c.is_solved():
+            return n
+
+def _bfs(depth):
+    """state key -> distance over face moves, for all states up to depth."""
+    dist = {Cube().state_key(): 0}
+    frontier = [Cube()]
+    for d in range(1, depth + 1):
+        nxt = []
+        for cube in frontier:
+            for m in FACE_MOVES:
+                child = cube.copy()
+                child.apply_move_idx(m)
+                key = child.state_key()
+                if key not in dist:
+                    dist[key] = d
+                    nxt.append(child)
+        frontier = nxt
+    return dist, frontier
+
+def test_move_orders_match_physical_cube():
+    # Wrong twist conventions show up as wrong orders (F R was 35)
+    for seq, order in [("R U", 105), ("F R", 105), ("L U", 105), ("B L", 105),
+                       ("R U'", 63), ("R U2 D' B D'", 1260)]:
+        assert _order(seq) == order, seq
+
+def test_superflip_flips_edges_only():
+    c = Cube()
+    c.apply_sequence("U R2 F B R B2 R U2 L B2 R U' D' R2 F R' L B2 U2 F2")
+    assert c.corners_pos.tolist() == list(range(8))
+    assert c.corners_ori.tolist() == [0] * 8
+    assert c.edges_pos.tolist() == list(range(12))
+    assert c.edges_ori.tolist() == [1] * 12
+
+def test_rotations_conjugate_face_moves():
+    for seq, face in [("y R y'", "B"), ("x U x'", "F"), ("z R z'", "U"), ("y F y'", "R")]:
+        a, b = Cube(), Cube()
+        a.apply_sequence(seq)
+        b.apply_move(face)
+        assert a == b, seq
+
+def test_every_symmetry_maps_moves_to_moves():
+    assert SYM_MOVE.shape == (N_SYMS, len(MOVE_NAMES))
+    assert (SYM_MOVE >= 0).all()
+
+def test_canonicalize_preserves_distance():
+    dist, _ = _bfs(3)
+    for key, d in dist.items():
+        cube = Cube.from_transform(_unpack(key))
+        rep, k = canonical_key(cube)
+        assert apply_symmetry(cube, k).state_key() == rep
+        assert dist.get(rep) == d
+
+def _unpack(key):
+    packed = np.frombuffer(key, dtype=np.uint8)
+    corners, edges = packed[:8], packed[8:]
+    return (corners & 7).astype(np.intp), corners >> 3, (edges & 15).astype(np.intp), edges >> 4
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from src.cube.cube import Cube
+from src.agent.two_phase import TwoPhaseSolver, _parity
+
+MAX_LENGTH = 30
+
+@pytest.fixture(scope="module")
+def solver():
+    return TwoPhaseSolver()
+
+def _random_state(rng, rotated=False):
+    """Uniformly random solvable state; rotated=True gives one that needs a
+    leading whole-cube rotation (corner and edge parities differ)."""
+    cp, ep = rng.permutation(8), rng.permutation(12)
+    if (_parity(cp) != _parity(ep)) != rotated:
+        ep[[0, 1]] = ep[[1, 0]]
+    co, eo = rng.integers(0, 3, 8), rng.integers(0, 2, 12)
+    co[-1] = -co[:-1].sum() % 3
+    eo[-1] = eo[:-1].sum() % 2
+    return Cube.from_transform((cp, co, ep, eo))
+
+def _check(solver, cube):
+    sol = solver.solve(cube, max_length=MAX_LENGTH)
+    assert sol is not None
+    assert len([m for m in sol if m != "y"]) <= MAX_LENGTH
+    solved = cube.copy()
+    solved.apply_sequence(" ".join(sol))
+    assert solved.is_solved(), sol
+
+def test_solves_random_states(solver):
+    rng = np.random.default_rng(0)
+    for _ in range(10):
+        _check(solver, _random_state(rng))
+
+def test_solves_states_needing_a_rotation(solver):
+    rng = np.random.default_rng(1)
+    for _ in range(3):
+        _check(solver, _random_state(rng, rotated=True))
+
+def test_solved_state(solver):
+    assert solver.solve(Cube()) == []
+
+def test_rejects_unsolvable_twist(solver):
+    cube = Cube()
+    cube.corners_ori[0] = 1
+    with pytest.raises(ValueError):
+        solver.solve(cube)